@@ -0,0 +1,69 @@
+import logging
+import os
+import zipfile
+
+
+def unique_name(name, used_names):
+    """
+    同名文件依次追加 " (1)"、" (2)"，结果只与使用顺序有关；不区分大小写，避免在 Windows 等文件系统上冲突
+    :param name: 文件名
+    :param used_names: 已使用的文件名（小写），返回的文件名会加入其中
+    :return: 不重复的文件名
+    """
+    stem, ext = os.path.splitext(name)
+    candidate, n = name, 0
+    while candidate.lower() in used_names:
+        n += 1
+        candidate = f"{stem} ({n}){ext}"
+    used_names.add(candidate.lower())
+    return candidate
+
+
+class ArchiveWriter:
+    """
+    压缩包输出：渲染好的文档直接从内存写入同一个 .zip 文件，不在输出文件夹中创建单独的文件或临时文件；
+    与 BackgroundWriter 接口相同，内存中同时只保留一份文档
+    """
+
+    def __init__(self, archive_path):
+        """
+        :param archive_path: 压缩包路径
+        """
+        self.archive_path = archive_path
+        # .docx 和 PDF 本身已经压缩，直接存储即可
+        self._zip = zipfile.ZipFile(archive_path, "w", zipfile.ZIP_STORED, allowZip64=True)
+        # 已使用的成员名（小写）
+        self._names = set()
+        self.errors = []
+
+    def write(self, path, data):
+        """
+        写入一个文档，成员名取自文件名
+        :param path: 文档路径（只使用文件名部分）
+        :param data: 文档内容（字节）
+        :return: 文档在压缩包中的位置（压缩包路径/成员名）
+        """
+        name = unique_name(os.path.basename(path), self._names)
+        location = f"{self.archive_path}/{name}"
+        try:
+            self._zip.writestr(name, data)
+        except Exception as e:
+            logging.error(f"写入 {location} 时出错: {e}")
+            self.errors.append((location, e))
+        return location
+
+    def close(self):
+        """
+        写入压缩包目录并关闭文件
+        :return: 写入失败的文档 [(文档在压缩包中的位置, 异常)]
+        """
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+        return self.errors
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,75 @@
+import logging
+import os
+import queue
+import threading
+import zlib
+
+
+class BackgroundWriter:
+    """
+    后台写出：渲染好的文档以字节形式放入有界队列，由写出线程写入临时文件后重命名为目标文件，
+    渲染线程不再等待磁盘（如网络文件夹）写入；内存占用以队列中的文档数为上限
+    """
+
+    def __init__(self, threads=1, queue_size=8):
+        """
+        :param threads: 写出线程数
+        :param queue_size: 等待写出的文档数上限，队列满时 write 会阻塞
+        """
+        threads = max(1, threads)
+        # 每个线程一个队列，同一路径总是交给同一个线程，保证同名文件按提交顺序写出
+        self._queues = [queue.Queue(max(1, queue_size // threads)) for _ in range(threads)]
+        self._threads = [threading.Thread(target=self._run, args=(q,), daemon=True) for q in self._queues]
+        self._lock = threading.Lock()
+        # 写出失败的文件 [(目标路径, 异常)]
+        self.errors = []
+        for thread in self._threads:
+            thread.start()
+
+    def write(self, path, data):
+        """
+        提交一个文件，队列已满时阻塞等待
+        :param path: 目标路径
+        :param data: 文件内容（字节）
+        """
+        index = zlib.crc32(os.fsencode(path)) % len(self._queues)
+        self._queues[index].put((path, data))
+
+    def _run(self, q):
+        while True:
+            item = q.get()
+            if item is None:
+                return
+            path, data = item
+            temp_path = path + ".tmp"
+            try:
+                with open(temp_path, "wb") as f:
+                    f.write(data)
+                os.replace(temp_path, path)
+            except Exception as e:
+                logging.error(f"写入 {path} 时出错: {e}")
+                with self._lock:
+                    self.errors.append((path, e))
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+
+    def close(self):
+        """
+        等待队列中的文件全部写出后结束写出线程
+        :return: 写出失败的文件 [(目标路径, 异常)]
+        """
+        if self._threads:
+            for q in self._queues:
+                q.put(None)
+            for thread in self._threads:
+                thread.join()
+            self._threads = []
+        return self.errors
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
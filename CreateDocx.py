@@ -1,19 +1,34 @@
-import pandas as pd
-from docx import Document
+from copy import deepcopy
+from io import BytesIO
 import os
+import sys
 import logging
 import re
-import tkinter as tk
-from tkinter import filedialog, messagebox
+import time
+from ExcelReader import ExcelRowSource
+from DocxZipWriter import DocxZipWriter
+from RenderManifest import RenderManifest, file_digest
+from RenderReport import RenderReport
+from BackgroundWriter import BackgroundWriter
+from ArchiveWriter import ArchiveWriter
+from StageTimer import stage, timed_iter, get_timer, enable_timing, disable_timing, run_profiled
 
 # 配置日志记录
 logging.basicConfig(level=logging.ERROR, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# 生成逻辑的版本号，修改会影响输出内容的逻辑时递增，使增量生成的清单失效
+LAYOUT_VERSION = 1
+
+# 函数：构建占位符正则表达式
+def build_placeholder_pattern(placeholders):
+    return re.compile("|".join(re.escape(placeholder) for placeholder in placeholders))
+
 # 函数：替换段落中的占位符
-def replace_paragraph_placeholder(paragraph, placeholder_dict):
+def replace_paragraph_placeholder(paragraph, placeholder_dict, pattern=None):
     try:
-        # 构建正则表达式模式
-        pattern = re.compile("|".join(re.escape(placeholder) for placeholder in placeholder_dict.keys()))
+        # 构建正则表达式模式（批量处理时由调用方传入预编译的模式）
+        if pattern is None:
+            pattern = build_placeholder_pattern(placeholder_dict.keys())
         # 合并段落中所有 run 的文本
         full_text = ''.join([run.text for run in paragraph.runs])
         # 进行替换
@@ -27,109 +42,182 @@ def replace_paragraph_placeholder(paragraph, placeholder_dict):
     except Exception as e:
         logging.error(f"替换段落 {paragraph.text[:20]}... 中占位符时出错: {e}")
 
-# 函数：替换表格中的占位符
-def replace_table_placeholder(table, placeholder_dict):
-    from docx.shared import Pt  # 导入 Pt 类用于设置字体大小
+# 函数：确保表格行不跨页断开（w:cantSplit）
+def set_row_cant_split(row):
     from docx.oxml import OxmlElement
+
+    # 确保行的 XML 元素有 w:trPr 节点
+    trPr = row._element.xpath('.//w:trPr')
+    if not trPr:
+        trPr = OxmlElement('w:trPr')
+        row._element.append(trPr)
+    else:
+        trPr = trPr[0]
+    # 检查是否已有 w:cantSplit 节点，没有则添加
+    cant_split = trPr.xpath('.//w:cantSplit')
+    if not cant_split:
+        cant_split = OxmlElement('w:cantSplit')
+        trPr.append(cant_split)
+
+# 函数：构建追加到表格末尾的新行原型
+def build_numbered_row_prototype(table, col_idx, digit_count):
+    """
+    按 table.add_row() 的结构构建一个新行原型：已设置 w:cantSplit，
+    col_idx 列的段落已设置好与序号位数对应的缩进，并带有字号为 10 的序号 run 和内容 run
+    :param digit_count: 序号的位数
+    :return: 行原型的 XML 元素（不在表格中）
+    """
+    from docx.shared import Pt  # 导入 Pt 类用于设置字体大小
+
+    new_row = table.add_row()
+    table._tbl.remove(new_row._tr)
+    # 为新行设置 w:cantSplit 属性
+    set_row_cant_split(new_row)
+    new_paragraph = new_row.cells[col_idx].paragraphs[0]
+    # 动态设置新段落的左缩进和首行缩进
+    new_paragraph.paragraph_format.left_indent = 120000 + (digit_count - 1) * 80000
+    new_paragraph.paragraph_format.first_line_indent = - (120000 + (digit_count - 1) * 80000)
+    num_run = new_paragraph.add_run("0. ")
+    num_run.font.size = Pt(10)  # 使用 Pt 类设置为 10 号字
+    content_run = new_paragraph.add_run()
+    content_run.font.size = Pt(10)  # 使用 Pt 类设置为 10 号字
+    return new_row._tr
+
+# 函数：将拆分出的其余部分一次性追加为表格新行
+def append_numbered_rows(table, col_idx, parts, start=2):
+    """
+    基于预先构建的行原型批量生成新行，最后一次性追加到表格末尾
+    :param parts: 需要追加的内容
+    :param start: 第一个部分的序号
+    """
     from docx.oxml.ns import qn
+    from docx.text.run import Run
+
+    prototypes = {}
+    new_rows = []
+    for i, part in enumerate(parts, start=start):
+        digit_count = len(str(i))
+        if digit_count not in prototypes:
+            prototypes[digit_count] = build_numbered_row_prototype(table, col_idx, digit_count)
+        tr = deepcopy(prototypes[digit_count])
+        # 原型中目标列的段落只有序号 run 和内容 run 两个 run
+        num_r, content_r = tr.tc_lst[col_idx].p_lst[0].r_lst
+        num_r.find(qn('w:t')).text = f"{i}. "
+        Run(content_r, None).text = part
+        new_rows.append(tr)
+    table._tbl.extend(new_rows)
+
+# 函数：替换单元格段落中的占位符，内容含分隔符 ; 时拆分为带序号的多行
+def replace_cell_paragraph_placeholder(table, paragraph, col_idx, placeholder_dict, pattern):
+    from docx.shared import Pt  # 导入 Pt 类用于设置字体大小
+
+    # 合并段落中所有 run 的文本
+    full_text = ''.join([run.text for run in paragraph.runs])
+    # 进行替换
+    new_text = pattern.sub(lambda m: placeholder_dict[m.group(0)], full_text)
+    # 处理分隔符 ; 并拆分内容
+    parts = new_text.split(';')
+    if len(parts) > 1:
+        # 清空当前单元格内容
+        for run in paragraph.runs:
+            run.text = ''
+        # 设置第一个部分到当前单元格并添加序号
+        if paragraph.runs:
+            paragraph.paragraph_format.left_indent = 120000
+            paragraph.paragraph_format.first_line_indent = - 120000
+            num_run = paragraph.add_run("1. ")
+            num_run.font.size = Pt(10)  # 使用 Pt 类设置为 10 号字
+            content_run = paragraph.add_run(parts[0])
+            content_run.font.size = Pt(10)  # 使用 Pt 类设置为 10 号字
+        # 为其余部分添加新行并添加序号
+        append_numbered_rows(table, col_idx, parts[1:])
+    else:
+        # 若没有分隔符，正常替换
+        replace_paragraph_placeholder(paragraph, placeholder_dict, pattern)
+
+# 类：模板占位符计划
+class PlaceholderPlan:
+    """
+    编译模板得到的占位符计划：一次性记录哪些正文段落、表格单元格段落包含哪些 {{列名}}
+    （包括被拆分到多个 run 中的占位符），渲染每一行时只访问这些位置
+    """
+    # 模板中占位符的通用匹配模式
+    TOKEN_PATTERN = re.compile(r"\{\{[^{}]*\}\}")
+
+    def __init__(self, doc):
+        """
+        编译模板，doc 的表格会被预先设置 w:cantSplit
+        :param doc: 模板文档对象
+        """
+        from docx.oxml.ns import qn
+
+        self._p_tag = qn('w:p')
+        # 段落在文档中的序号，克隆出的文档结构相同，可按序号定位
+        ordinals = {p: i for i, p in enumerate(doc.element.iter(self._p_tag))}
+        # 每个位置：(段落序号, 所在列序号（正文段落为 None）, 段落中的占位符)
+        self.locations = []
+        self.tokens = set()
 
-    for row in table.rows:
-        # 确保行的 XML 元素有 w:trPr 节点
-        trPr = row._element.xpath('.//w:trPr')
-        if not trPr:
-            trPr = OxmlElement('w:trPr')
-            row._element.append(trPr)
-        else:
-            trPr = trPr[0]
-        # 检查是否已有 w:cantSplit 节点，没有则添加
-        cant_split = trPr.xpath('.//w:cantSplit')
-        if not cant_split:
-            cant_split = OxmlElement('w:cantSplit')
-            trPr.append(cant_split)
-
-    for row_idx, row in enumerate(table.rows):
-        for col_idx, cell in enumerate(row.cells):
-            for paragraph in cell.paragraphs:
-                # 合并段落中所有 run 的文本
-                full_text = ''.join([run.text for run in paragraph.runs])
-                # 构建正则表达式模式
-                pattern = re.compile("|".join(re.escape(placeholder) for placeholder in placeholder_dict.keys()))
-                # 进行替换
-                new_text = pattern.sub(lambda m: placeholder_dict[m.group(0)], full_text)
-                # 处理分隔符 ; 并拆分内容
-                parts = new_text.split(';')
-                if len(parts) > 1:
-                    # 清空当前单元格内容
-                    for run in paragraph.runs:
-                        run.text = ''
-                    # 设置第一个部分到当前单元格并添加序号
-                    if paragraph.runs:
-                        paragraph.paragraph_format.left_indent = 120000
-                        paragraph.paragraph_format.first_line_indent = - 120000
-                        num_run = paragraph.add_run("1. ")
-                        num_run.font.size = Pt(10)  # 使用 Pt 类设置为 10 号字
-                        content_run = paragraph.add_run(parts[0])
-                        content_run.font.size = Pt(10)  # 使用 Pt 类设置为 10 号字
-                    # 为其余部分添加新行并添加序号
-                    for i, part in enumerate(parts[1:], start=2):
-                        new_row = table.add_row()
-                        # 为新行设置 w:cantSplit 属性
-                        new_trPr = new_row._element.xpath('.//w:trPr')
-                        if not new_trPr:
-                            new_trPr = OxmlElement('w:trPr')
-                            new_row._element.append(new_trPr)
-                        else:
-                            new_trPr = new_trPr[0]
-                        new_cant_split = new_trPr.xpath('.//w:cantSplit')
-                        if not new_cant_split:
-                            new_cant_split = OxmlElement('w:cantSplit')
-                            new_trPr.append(new_cant_split)
-                        new_cell = new_row.cells[col_idx]
-                        new_paragraph = new_cell.paragraphs[0]
-                        # 动态设置新段落的左缩进和首行缩进
-                        digit_count = len(str(i))
-                        new_paragraph.paragraph_format.left_indent = 120000 + (digit_count - 1) * 80000
-                        new_paragraph.paragraph_format.first_line_indent = - (120000 + (digit_count - 1) * 80000)
-                        num_run = new_paragraph.add_run(f"{i}. ")
-                        num_run.font.size = Pt(10)  # 使用 Pt 类设置为 10 号字
-                        content_run = new_paragraph.add_run(part)
-                        content_run.font.size = Pt(10)  # 使用 Pt 类设置为 10 号字
-                else:
-                    # 若没有分隔符，正常替换
-                    replace_paragraph_placeholder(paragraph, placeholder_dict)
-
-# 函数：替换文档中的占位符
-def replace_placeholder(doc, placeholder_dict):
-    try:
-        for paragraph in doc.paragraphs:
-            replace_paragraph_placeholder(paragraph, placeholder_dict)
-        for table in doc.tables:
-            replace_table_placeholder(table, placeholder_dict)
-        
-        # 检查未替换的占位符
-        remaining_placeholders = set()
-        pattern = re.compile("|".join(re.escape(placeholder) for placeholder in placeholder_dict.keys()))
-        # 检查段落
         for paragraph in doc.paragraphs:
-            full_text = ''.join([run.text for run in paragraph.runs])
-            for match in pattern.finditer(full_text):
-                remaining_placeholders.add(match.group(0))
-        # 检查表格
+            tokens = self._find_tokens(paragraph)
+            if tokens:
+                self.locations.append((ordinals[paragraph._p], None, tokens))
+
+        seen = set()
         for table in doc.tables:
             for row in table.rows:
-                for cell in row.cells:
+                set_row_cant_split(row)
+            for row in table.rows:
+                for col_idx, cell in enumerate(row.cells):
                     for paragraph in cell.paragraphs:
-                        full_text = ''.join([run.text for run in paragraph.runs])
-                        for match in pattern.finditer(full_text):
-                            remaining_placeholders.add(match.group(0))
-        
-        if remaining_placeholders:
-            print(f"未替换的占位符: {remaining_placeholders}")
-        else:
-            print("所有占位符已成功替换。")
+                        # 合并单元格会在 row.cells 中重复出现，只记录一次
+                        if paragraph._p in seen:
+                            continue
+                        seen.add(paragraph._p)
+                        tokens = self._find_tokens(paragraph)
+                        # 不含占位符但含分隔符 ; 的单元格每行拆分结果都相同，同样需要处理
+                        if tokens or ';' in ''.join([run.text for run in paragraph.runs]):
+                            self.locations.append((ordinals[paragraph._p], col_idx, tokens))
 
-    except Exception as e:
-        logging.error(f"替换文档占位符时出错: {e}")
+    def _find_tokens(self, paragraph):
+        full_text = ''.join([run.text for run in paragraph.runs])
+        tokens = frozenset(self.TOKEN_PATTERN.findall(full_text))
+        self.tokens.update(tokens)
+        return tokens
+
+    def unresolved(self, placeholders):
+        """
+        根据计划得出未替换的占位符，无需再次遍历文档
+        :param placeholders: 可用的占位符（Excel 列名生成）
+        :return: 模板中有、但没有对应列的占位符集合
+        """
+        return self.tokens.difference(placeholders)
+
+    def render(self, doc, placeholder_dict, pattern):
+        """
+        按计划替换文档中的占位符
+        :param doc: 由同一模板克隆出的文档对象
+        :param placeholder_dict: 占位符字典
+        :param pattern: 本批次预编译的占位符正则表达式
+        """
+        from docx.table import Table
+        from docx.text.paragraph import Paragraph
+
+        paragraphs = list(doc.element.iter(self._p_tag))
+        # 正文段落的位置都排在表格单元格之前
+        with stage("replace_placeholder"):
+            for ordinal, col_idx, tokens in self.locations:
+                if col_idx is not None:
+                    break
+                replace_paragraph_placeholder(Paragraph(paragraphs[ordinal], doc._body), placeholder_dict, pattern)
+        with stage("replace_table_placeholder"):
+            for ordinal, col_idx, tokens in self.locations:
+                if col_idx is None:
+                    continue
+                p = paragraphs[ordinal]
+                # 段落 -> 单元格 -> 行 -> 表格
+                table = Table(p.getparent().getparent().getparent(), doc._body)
+                replace_cell_paragraph_placeholder(table, Paragraph(p, table), col_idx, placeholder_dict, pattern)
 
 # 函数：获取文档标题
 def get_document_title(doc):
@@ -137,55 +225,312 @@ def get_document_title(doc):
         return doc.paragraphs[0].text.strip().replace("/", "_")
     return "Untitled"
 
+# 类：模板缓存
+class TemplateCache:
+    """
+    Word 模板缓存：模板文件只打开、解析一次，
+    每行数据基于已解析的 XML 树克隆出一份新的正文，样式、编号、图片等未改动的部件在各行之间共享
+    """
+    def __init__(self, template_path, compresslevel=6):
+        """
+        :param template_path: 模板文件路径
+        :param compresslevel: 保存时正文部件的压缩级别（0-9）
+        """
+        from docx import Document
+
+        self.template_path = template_path
+        self._doc = Document(template_path)
+        self._part = self._doc.part
+        # 编译占位符计划（同时为表格行设置 w:cantSplit）
+        self.plan = PlaceholderPlan(self._doc)
+        # 保存一份未被修改的正文 XML 树作为克隆源
+        self._pristine_element = deepcopy(self._part._element)
+        # 保存时未改动的部件直接复制模板中已压缩的字节，模板不支持时使用 doc.save
+        try:
+            self._zip_writer = DocxZipWriter(template_path, compresslevel)
+        except ValueError as e:
+            logging.error(f"模板 {template_path} 无法使用快速写出: {e}")
+            self._zip_writer = None
+        self._part_name = self._part.partname[1:]
+        self._rel_count = len(self._part.rels)
+
+    def new_document(self):
+        """
+        返回一个基于模板克隆的新文档对象
+        注意：各次返回的文档共享同一个包，上一份文档保存完成后才能取下一份
+        :return: 文档对象
+        """
+        self._part._element = deepcopy(self._pristine_element)
+        return self._part.document
+
+    def save(self, doc, file):
+        """
+        保存由 new_document 得到的文档：只重新序列化、压缩正文部件，其余部件直接复制模板中已压缩的字节
+        :param doc: 文档对象
+        :param file: 输出文件路径或可写的文件对象
+        :return: 写出的字节数
+        """
+        # 渲染过程中新增了关系（如图片、超链接）时，其他部件也可能改变，使用完整保存
+        if (self._zip_writer is None or self._part_name not in self._zip_writer.names
+                or len(self._part.rels) != self._rel_count):
+            doc.save(file)
+            return os.path.getsize(file) if isinstance(file, str) else file.tell()
+        return self._zip_writer.write(file, {self._part_name: self._part.blob})
+
+# 函数：渲染并保存单个文档
+def render_document(template_cache, placeholder_dict, pattern, output_folder, suffix='', writer=None):
+    """
+    基于模板缓存渲染一行数据并保存
+    :param suffix: 保存时追加在文件名后的后缀（并行模式下先写入临时文件）
+    :param writer: 后台写出器或压缩包，指定时文档先序列化到内存再交给它写出
+    :return: (最终输出文件名（写入压缩包时为压缩包路径/成员名）, 实际保存的文件名, 写出的字节数)
+    """
+    with stage("clone_template"):
+        doc = template_cache.new_document()
+    template_cache.plan.render(doc, placeholder_dict, pattern)
+    title = get_document_title(doc)
+    output_filename = f"{output_folder}/{title}.docx"
+    if writer is not None:
+        buffer = BytesIO()
+        with stage("save"):
+            bytes_written = template_cache.save(doc, buffer)
+        # 队列已满时在此等待写出线程
+        with stage("write_queue"):
+            location = writer.write(output_filename + suffix, buffer.getbuffer())
+        # 写入压缩包时使用文档在压缩包中的位置
+        if location is not None:
+            output_filename = location
+    else:
+        with stage("save"):
+            bytes_written = template_cache.save(doc, output_filename + suffix)
+    return output_filename, output_filename + suffix, bytes_written
+
+# 工作进程内的状态：每个进程只加载一次模板
+_worker_state = {}
+
+# 函数：初始化工作进程
+def _init_worker(template_path, placeholders, compresslevel, timing):
+    if timing:
+        # 工作进程的分阶段计时随每批结果回传给主进程合并
+        enable_timing()
+    with stage("load_template"):
+        _worker_state['template_cache'] = TemplateCache(template_path, compresslevel)
+    _worker_state['placeholders'] = placeholders
+    _worker_state['pattern'] = build_placeholder_pattern(placeholders)
+
+# 函数：在工作进程中渲染一批行
+def _render_chunk(output_folder, chunk):
+    """
+    :param chunk: [(行号, 行数据值列表), ...]
+    :return: ([(行号, 最终输出文件名, 临时文件名, 写出的字节数, 渲染耗时, 错误信息), ...],
+              本批的分阶段计时（未启用时为 None）)
+    """
+    results = []
+    for index, values in chunk:
+        start_time = time.perf_counter()
+        try:
+            placeholder_dict = dict(zip(_worker_state['placeholders'], values))
+            # 先写入带行号的临时文件，由主进程按行号顺序重命名，保证同名文件的结果与串行一致
+            output_filename, temp_filename, bytes_written = render_document(
+                _worker_state['template_cache'], placeholder_dict, _worker_state['pattern'],
+                output_folder, suffix=f".{index}.tmp")
+            results.append((index, output_filename, temp_filename, bytes_written,
+                            time.perf_counter() - start_time, None))
+        except Exception as e:
+            results.append((index, None, None, None, time.perf_counter() - start_time, str(e)))
+    timer = get_timer()
+    return results, None if timer is None else timer.take()
+
+# 函数：按块并行渲染，按行号顺序返回结果
+def _iter_parallel_results(rows, template_path, placeholders, output_folder, workers, chunk_size, compresslevel):
+    from concurrent.futures import ProcessPoolExecutor
+    from itertools import islice
+
+    timer = get_timer()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(template_path, placeholders, compresslevel, timer is not None)) as executor:
+        # 只保留有限数量的在途任务，避免一次性提交全部行
+        pending = []
+        rows = iter(rows)
+        while True:
+            while len(pending) < workers * 2:
+                chunk = list(islice(rows, chunk_size))
+                if not chunk:
+                    break
+                pending.append(executor.submit(_render_chunk, output_folder, chunk))
+            if not pending:
+                break
+            results, stats = pending.pop(0).result()
+            if stats:
+                timer.merge(stats)
+            yield from results
+
+# 函数：按增量生成清单过滤出需要生成的行
+def _iter_rows_to_render(source, manifest, row_hashes, report):
+    """
+    :param row_hashes: 记录需要生成的行的哈希 {行号: 行哈希}
+    :return: 生成 (行号, 行数据)
+    """
+    for index, values in enumerate(timed_iter(source, "read_excel")):
+        if manifest is not None:
+            row_hash = manifest.row_hash(values)
+            # 输出文件名在生成后才能确定，标题相同的行由 manifest.resolve_overwrites 处理
+            if manifest.is_current(row_hash, index=index):
+                report.add_skipped(index, manifest.output_path(row_hash))
+                continue
+            row_hashes[index] = row_hash
+        yield index, values
+
+# 函数：重新生成被跳过、但输出文件已被标题相同的其他行覆盖的行
+def _render_overwritten_rows(source, rows_to_render, template_path, compresslevel, placeholders, pattern,
+                             output_folder, manifest, report):
+    """
+    :param rows_to_render: manifest.resolve_overwrites 返回的 [(行号, 行哈希)]
+    """
+    row_hashes = dict(rows_to_render)
+    template_cache = TemplateCache(template_path, compresslevel)
+    remaining_placeholders = template_cache.plan.unresolved(placeholders)
+    # 重新读取 Excel，只生成需要的行（直接写出，后台写出线程此时已结束）
+    for index, values in enumerate(source):
+        row_hash = row_hashes.get(index)
+        if row_hash is None:
+            continue
+        report.discard_skipped(index)
+        start_time = time.perf_counter()
+        try:
+            output_filename, _, bytes_written = render_document(template_cache, dict(zip(placeholders, values)),
+                                                                pattern, output_folder)
+            manifest.record(row_hash, output_filename)
+            report.add_success(index, output_filename, remaining_placeholders, bytes_written,
+                               time.perf_counter() - start_time)
+        except Exception as e:
+            report.add_error(index, e, time.perf_counter() - start_time)
+        if index >= rows_to_render[-1][0]:
+            break
+
 # 函数：生成文档
-def generate_documents(excel_path, template_path, output_folder):
+def generate_documents(excel_path, template_path, output_folder, workers=1, chunk_size=16, compresslevel=6,
+                       incremental=False, prune=False, report_path=None, quiet=False, timing=False,
+                       writer_threads=2, write_queue=8, archive_path=None):
+    """
+    :param workers: 工作进程数，1 为串行，0 表示使用全部 CPU 核心
+    :param chunk_size: 并行模式下每次分派给工作进程的行数
+    :param compresslevel: 生成文档中正文部件的压缩级别（0-9），其余部件沿用模板中的压缩数据
+    :param incremental: 增量生成，只重新生成数据或模板有变化、或输出文件缺失的行
+    :param prune: 增量生成时删除 Excel 中已不存在的行对应的输出文件
+    :param report_path: 渲染报告（.json 或 .jsonl）的保存路径，为 None 时不保存
+    :param quiet: 安静模式，不在控制台逐行输出生成信息
+    :param timing: 记录各阶段（读取 Excel、加载模板、替换占位符、保存）的耗时和调用次数，结束时输出汇总表
+    :param writer_threads: 串行模式下后台写出文件的线程数，0 表示在渲染线程中直接写出
+    :param write_queue: 等待后台写出的文档数上限
+    :param archive_path: 压缩包路径，指定时所有文档从内存直接写入该 .zip，不在输出文件夹中创建文件
+    """
     if not os.path.exists(excel_path):
         raise FileNotFoundError(f"Excel文件未找到: {excel_path}")
     if not os.path.exists(template_path):
         raise FileNotFoundError(f"Word模板文件未找到: {template_path}")
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    if archive_path:
+        if incremental:
+            raise ValueError("输出到压缩包时不支持增量生成")
+        if workers > 1:
+            # 工作进程写出的临时文件需要再读入压缩包，压缩包模式在主进程中串行渲染
+            logging.warning("输出到压缩包时使用串行模式")
+            workers = 1
+        writer = ArchiveWriter(archive_path)
+    elif workers == 1 and writer_threads > 0:
+        writer = BackgroundWriter(writer_threads, write_queue)
+    else:
+        writer = None
+    timer = enable_timing() if timing else None
+    try:
+        _generate_documents(excel_path, template_path, output_folder, workers, chunk_size, compresslevel,
+                            incremental, prune, report_path, quiet, writer)
+    finally:
+        if writer is not None:
+            # 出错提前结束时也要结束写出线程、关闭压缩包
+            writer.close()
+        if timer is not None:
+            disable_timing()
+            print(timer.format_table())
+
+def _generate_documents(excel_path, template_path, output_folder, workers, chunk_size, compresslevel,
+                        incremental, prune, report_path, quiet, writer):
+    # 流式读取 Excel，列名只转换一次为占位符，空单元格已转换为空字符串
+    with stage("read_excel"):
+        source = ExcelRowSource(excel_path)
+    placeholders = source.placeholders
+    # 整批只编译一次正则表达式
+    pattern = build_placeholder_pattern(placeholders)
+
+    # 增量生成清单，行哈希包含列名、模板内容和生成逻辑版本
+    manifest = None
+    if incremental:
+        manifest = RenderManifest(output_folder, [LAYOUT_VERSION, file_digest(template_path), placeholders])
+    # 每行的结果先缓冲在报告中，结束时一次写出
+    report = RenderReport(report_path, quiet, excel=excel_path, template=template_path, output_folder=output_folder)
+    row_hashes = {}
+    rows = _iter_rows_to_render(source, manifest, row_hashes, report)
 
-    df = pd.read_excel(excel_path)
-    # 直接将 DataFrame 中的 nan 替换为空字符串
-    df = df.fillna('')  
+    if workers > 1:
+        from docx import Document
 
-    for index, row in df.iterrows():
+        # 检查未替换的占位符只需要模板的计划，由主进程统一输出
+        with stage("load_template"):
+            remaining_placeholders = PlaceholderPlan(Document(template_path)).unresolved(placeholders)
+        for index, output_filename, temp_filename, bytes_written, render_time, error in _iter_parallel_results(
+                rows, template_path, placeholders, output_folder, workers, chunk_size, compresslevel):
+            row_hash = row_hashes.pop(index, None)
+            if error is not None:
+                report.add_error(index, error, render_time)
+                continue
+            os.replace(temp_filename, output_filename)
+            if manifest is not None:
+                manifest.record(row_hash, output_filename, index)
+            report.add_success(index, output_filename, remaining_placeholders, bytes_written, render_time)
+    else:
+        # 模板只解析一次，每行使用克隆的文档
+        with stage("load_template"):
+            template_cache = TemplateCache(template_path, compresslevel)
+        remaining_placeholders = template_cache.plan.unresolved(placeholders)
+
+        # 渲染与写出流水线：渲染好的文档交给后台线程写入磁盘，或直接写入压缩包
         try:
-            doc = Document(template_path)
-            # 自动根据 Excel 列名生成占位符字典
-            placeholder_dict = {f"{{{{{col}}}}}": str(row[col]) for col in df.columns}
-            replace_placeholder(doc, placeholder_dict)
-            title = get_document_title(doc)
-            output_filename = f"{output_folder}/{title}.docx"
-            doc.save(output_filename)
-            print(f"生成文档：{output_filename}")
-        except Exception as e:
-            print(f"生成第 {index + 1} 个文档时出错: {e}")
-
-# 函数：选择 Excel 文件
-def select_excel_file():
-    file_path = filedialog.askopenfilename(filetypes=[("Excel files", "*.xlsx")])
-    if file_path:
-        excel_path_entry.delete(0, tk.END)
-        excel_path_entry.insert(0, file_path)
-
-def select_template_file():
-    file_path = filedialog.askopenfilename(filetypes=[("Word files", "*.docx")])
-    if file_path:
-        template_path_entry.delete(0, tk.END)
-        template_path_entry.insert(0, file_path)
-
-# 新增函数：选择输出文件夹
-def select_output_folder():
-    folder_path = filedialog.askdirectory()
-    if folder_path:
-        output_folder_entry.delete(0, tk.END)
-        output_folder_entry.insert(0, folder_path)
-
-def run_generation():
-    excel_path = excel_path_entry.get()
-    template_path = template_path_entry.get()
-    output_folder = output_folder_entry.get()
+            for index, values in rows:
+                row_hash = row_hashes.pop(index, None)
+                start_time = time.perf_counter()
+                try:
+                    placeholder_dict = dict(zip(placeholders, values))
+                    output_filename, _, bytes_written = render_document(template_cache, placeholder_dict, pattern,
+                                                                        output_folder, writer=writer)
+                    if manifest is not None:
+                        manifest.record(row_hash, output_filename, index)
+                    report.add_success(index, output_filename, remaining_placeholders, bytes_written,
+                                       time.perf_counter() - start_time)
+                except Exception as e:
+                    report.add_error(index, e, time.perf_counter() - start_time)
+        finally:
+            if writer is not None:
+                with stage("write_wait"):
+                    write_errors = writer.close()
+                # 写出失败的文档改记为出错，且不记入清单
+                for output_filename, error in write_errors:
+                    report.mark_error(output_filename, error)
+                    if manifest is not None:
+                        manifest.discard(output_filename)
 
+    if manifest is not None:
+        rows_to_render = manifest.resolve_overwrites()
+        if rows_to_render:
+            _render_overwritten_rows(source, rows_to_render, template_path, compresslevel, placeholders, pattern,
+                                     output_folder, manifest, report)
+        manifest.save(prune)
+        print(manifest.summary())
+    report.write()
+
+# 函数：准备输出文件夹
+def prepare_output_folder(output_folder):
     # 如果用户没有选择输出文件夹，使用默认路径
     if not output_folder:
         script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -194,45 +539,149 @@ def run_generation():
     # 创建输出文件夹（如果不存在）
     if not os.path.exists(output_folder):
         os.makedirs(output_folder)
+    return output_folder
+
+# 函数：运行图形界面
+def run_gui():
+    import tkinter as tk
+    from tkinter import filedialog, messagebox
+
+    # 函数：选择 Excel 文件
+    def select_excel_file():
+        file_path = filedialog.askopenfilename(filetypes=[("Excel files", "*.xlsx")])
+        if file_path:
+            excel_path_entry.delete(0, tk.END)
+            excel_path_entry.insert(0, file_path)
+
+    def select_template_file():
+        file_path = filedialog.askopenfilename(filetypes=[("Word files", "*.docx")])
+        if file_path:
+            template_path_entry.delete(0, tk.END)
+            template_path_entry.insert(0, file_path)
 
+    # 新增函数：选择输出文件夹
+    def select_output_folder():
+        folder_path = filedialog.askdirectory()
+        if folder_path:
+            output_folder_entry.delete(0, tk.END)
+            output_folder_entry.insert(0, folder_path)
+
+    def run_generation():
+        excel_path = excel_path_entry.get()
+        template_path = template_path_entry.get()
+        output_folder = prepare_output_folder(output_folder_entry.get())
+
+        try:
+            workers = int(workers_entry.get() or 1)
+            print(f"开始处理 {excel_path} 和 {template_path}")
+            generate_documents(excel_path, template_path, output_folder, workers=workers,
+                               incremental=incremental_var.get(), prune=prune_var.get())
+            print(f"完成处理 {excel_path} 和 {template_path}")
+            messagebox.showinfo("完成", "所有文档生成完成。")
+        except Exception as e:
+            messagebox.showerror("错误", f"处理时出错: {e}")
+
+    # 创建主窗口
+    root = tk.Tk()
+    root.title("文档生成工具")
+
+    # 创建标签和输入框
+    excel_label = tk.Label(root, text="Excel 文件路径:")
+    excel_label.pack()
+    excel_path_entry = tk.Entry(root, width=50)
+    excel_path_entry.pack()
+    excel_button = tk.Button(root, text="选择 Excel 文件", command=select_excel_file)
+    excel_button.pack()
+
+    template_label = tk.Label(root, text="Word 模板文件路径:")
+    template_label.pack()
+    template_path_entry = tk.Entry(root, width=50)
+    template_path_entry.pack()
+    template_button = tk.Button(root, text="选择 Word 模板文件", command=select_template_file)
+    template_button.pack()
+
+    # 新增：输出文件夹标签和输入框
+    output_folder_label = tk.Label(root, text="输出文件夹路径:")
+    output_folder_label.pack()
+    output_folder_entry = tk.Entry(root, width=50)
+    output_folder_entry.pack()
+    output_folder_button = tk.Button(root, text="选择输出文件夹", command=select_output_folder)
+    output_folder_button.pack()
+
+    # 并行进程数输入框
+    workers_label = tk.Label(root, text="并行进程数（1 为串行，0 为全部核心）:")
+    workers_label.pack()
+    workers_entry = tk.Entry(root, width=10)
+    workers_entry.insert(0, "1")
+    workers_entry.pack()
+
+    # 增量生成选项
+    incremental_var = tk.BooleanVar(value=False)
+    incremental_checkbox = tk.Checkbutton(root, text="增量生成（只生成有变化的行）", variable=incremental_var)
+    incremental_checkbox.pack()
+    prune_var = tk.BooleanVar(value=False)
+    prune_checkbox = tk.Checkbutton(root, text="删除已不存在的行对应的文档", variable=prune_var)
+    prune_checkbox.pack()
+
+    # 创建运行按钮
+    run_button = tk.Button(root, text="生成文档", command=run_generation)
+    run_button.pack()
+
+    # 运行主循环
+    root.mainloop()
+
+# 函数：构建命令行参数解析器
+def build_parser(prog=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog=prog, description="根据 Excel 数据替换 Word 模板中的占位符，批量生成文档。不带参数时启动图形界面。")
+    parser.add_argument("--gui", action="store_true", help="启动图形界面")
+    parser.add_argument("--excel", help="Excel 文件路径（.xlsx）")
+    parser.add_argument("--template", help="Word 模板文件路径（.docx）")
+    parser.add_argument("--output", default="", help="输出文件夹路径，默认为脚本目录下的 output")
+    parser.add_argument("--workers", type=int, default=1, help="工作进程数，1 为串行，0 表示使用全部 CPU 核心")
+    parser.add_argument("--chunk-size", type=int, default=16, help="并行模式下每次分派给工作进程的行数")
+    parser.add_argument("--incremental", action="store_true", help="增量生成：只重新生成有变化或输出缺失的行")
+    parser.add_argument("--prune", action="store_true", help="增量生成时删除已不存在的行对应的输出文件")
+    parser.add_argument("--report", help="渲染报告的保存路径（.json 或 .jsonl）")
+    parser.add_argument("--quiet", action="store_true", help="安静模式：不逐行输出生成信息（出错信息仍然输出）")
+    parser.add_argument("--compress-level", type=int, default=6, choices=range(10), metavar="0-9",
+                        help="生成文档中正文部件的压缩级别，越低越快、文件越大")
+    parser.add_argument("--writer-threads", type=int, default=2,
+                        help="串行模式下后台写出文件的线程数，0 表示渲染后直接写出")
+    parser.add_argument("--write-queue", type=int, default=8, help="等待后台写出的文档数上限（限制内存占用）")
+    parser.add_argument("--archive", metavar="ZIP", help="将所有文档直接写入该 .zip 压缩包，不在输出文件夹中创建文件")
+    parser.add_argument("--timing", action="store_true", help="输出各阶段的耗时和调用次数汇总表")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="使用 cProfile 分析整个运行过程（并行模式下只包含主进程），保存为 pstats 文件")
+    return parser
+
+# 主函数
+def main(argv=None, prog=None):
+    parser = build_parser(prog)
+    args = parser.parse_args(argv)
+    if args.gui or not (args.excel or args.template):
+        run_gui()
+        return 0
+    if not args.excel or not args.template:
+        parser.error("无界面模式需要同时指定 --excel 和 --template")
+
+    # 无界面模式，输出到压缩包时不需要创建输出文件夹
+    output_folder = args.output if args.archive else prepare_output_folder(args.output)
     try:
-        print(f"开始处理 {excel_path} 和 {template_path}")
-        generate_documents(excel_path, template_path, output_folder)
-        print(f"完成处理 {excel_path} 和 {template_path}")
-        messagebox.showinfo("完成", "所有文档生成完成。")
+        print(f"开始处理 {args.excel} 和 {args.template}")
+        run_profiled(args.profile, generate_documents, args.excel, args.template, output_folder,
+                     workers=args.workers, chunk_size=args.chunk_size,
+                     compresslevel=args.compress_level,
+                     incremental=args.incremental, prune=args.prune,
+                     report_path=args.report, quiet=args.quiet, timing=args.timing,
+                     writer_threads=args.writer_threads, write_queue=args.write_queue,
+                     archive_path=args.archive)
+        print(f"完成处理 {args.excel} 和 {args.template}")
     except Exception as e:
-        messagebox.showerror("错误", f"处理时出错: {e}")
-
-# 创建主窗口
-root = tk.Tk()
-root.title("文档生成工具")
-
-# 创建标签和输入框
-excel_label = tk.Label(root, text="Excel 文件路径:")
-excel_label.pack()
-excel_path_entry = tk.Entry(root, width=50)
-excel_path_entry.pack()
-excel_button = tk.Button(root, text="选择 Excel 文件", command=select_excel_file)
-excel_button.pack()
-
-template_label = tk.Label(root, text="Word 模板文件路径:")
-template_label.pack()
-template_path_entry = tk.Entry(root, width=50)
-template_path_entry.pack()
-template_button = tk.Button(root, text="选择 Word 模板文件", command=select_template_file)
-template_button.pack()
-
-# 新增：输出文件夹标签和输入框
-output_folder_label = tk.Label(root, text="输出文件夹路径:")
-output_folder_label.pack()
-output_folder_entry = tk.Entry(root, width=50)
-output_folder_entry.pack()
-output_folder_button = tk.Button(root, text="选择输出文件夹", command=select_output_folder)
-output_folder_button.pack()
-
-# 创建运行按钮
-run_button = tk.Button(root, text="生成文档", command=run_generation)
-run_button.pack()
-
-# 运行主循环
-root.mainloop()
\ No newline at end of file
+        print(f"处理时出错: {e}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,8 @@
-import pandas as pd
 from docx import Document
 import os
 import logging
 import re
+from ExcelReader import ExcelRowSource
 
 # 配置日志记录
 logging.basicConfig(level=logging.ERROR, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -78,12 +78,11 @@ def generate_documents(excel_path, template_path, output_folder):
     if not os.path.exists(template_path):
         raise FileNotFoundError(f"Word模板文件未找到: {template_path}")
 
-    df = pd.read_excel(excel_path)
-    for index, row in df.iterrows():
+    # 流式读取 Excel，自动根据列名生成占位符字典，空单元格已转换为空字符串
+    source = ExcelRowSource(excel_path)
+    for index, placeholder_dict in enumerate(source.iter_placeholder_dicts()):
         try:
             doc = Document(template_path)
-            # 自动根据 Excel 列名生成占位符字典
-            placeholder_dict = {f"{{{{{col}}}}}": str(row[col]) for col in df.columns}
             replace_placeholder(doc, placeholder_dict)
             title = get_document_title(doc)
             output_filename = f"{output_folder}/{title}.docx"
@@ -1,20 +1,170 @@
 import os
 import re
-import pandas as pd
+import sys
 import logging
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Table, TableStyle, PageBreak
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib.units import inch
-# 新增导入 tkinter 库
-import tkinter as tk
-from tkinter import filedialog, messagebox
+from io import BytesIO
+from operator import itemgetter
+from types import MappingProxyType
+from ArchiveWriter import ArchiveWriter, unique_name
+from BackgroundWriter import BackgroundWriter
+from ExcelReader import ExcelRowSource
+from RenderManifest import RenderManifest
+from StageTimer import stage, timed_iter, get_timer, enable_timing, disable_timing, run_profiled
 
 # 定义一个常量，代表每个数字所占的宽度
 DIGIT_WIDTH = 4
 # 定义序号和文本之间的固定间隔
 SPACE_WIDTH = 6
+# Excel 中用于生成 PDF 的列，按 create_pdf 的参数顺序排列
+PDF_FIELDS = ('requirement_purpose', 'background', 'test_area', 'mode', 'node_number', 'fmea', 'title', 'steps')
+# 界面中合并生成时的文件名
+COMBINED_PDF_NAME = "combined.pdf"
+# 文件名中不允许的字符
+_UNSAFE_FILENAME_CHARS = re.compile(r'[\\/*?:"<>|]')
+# 版式版本号，修改会影响 PDF 内容的版式时递增，使增量生成的清单失效
+LAYOUT_VERSION = 1
+# 步骤数超过该值时过程表格使用长表格模式，按页逐块排版，耗时和内存随步骤数线性增长
+LONG_TABLE_STEPS = 100
+
+# 样式注册表，每个进程只构建一次（见 get_pdf_styles）
+_pdf_styles = None
+
+class PdfStyles:
+    """
+    共享的 ReportLab 样式：段落样式、表格样式每个进程只构建一次，所有行共用，每行只需创建与数据有关的内容；
+    样式被所有行共享，不能修改，需要不同的样式时应另行注册
+    """
+
+    def __init__(self):
+        from reportlab.lib import colors
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.platypus import TableStyle
+
+        sample = getSampleStyleSheet()
+        # 段落样式：从示例样式派生新样式，不修改示例样式本身
+        self.paragraph = MappingProxyType({
+            # 小标题：Heading1 调整字体大小，行距不变
+            'title': ParagraphStyle('Title', parent=sample['Heading1'], fontSize=12),
+            # 正文：Normal 调整字体大小，行距不变
+            'body': ParagraphStyle('Body', parent=sample['Normal'], fontSize=8),
+            # 用于分隔表格的空白段落
+            'heading_spacer': sample['Heading1'],
+            'spacer': sample['Normal'],
+        })
+        # 表格样式
+        self.table = MappingProxyType({
+            'title': TableStyle([
+                ('BACKGROUND', (0, 0), (-1, -1), colors.white),  # 背景颜色设为白色
+                ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, -1), 12),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+                ('LINEABOVE', (0, 0), (-1, 0), 1, colors.lightblue),  # 上侧淡蓝色线条
+                ('LINELEFT', (0, 0), (0, -1), 1, colors.lightblue),  # 左侧淡蓝色线条，覆盖整个左侧
+            ]),
+            'requirement': TableStyle([
+                ('BACKGROUND', (0, 0), (0, 0), colors.lightblue),  # 设置 Requirement/Purpose 背景颜色为浅蓝色
+                ('BACKGROUND', (0, 1), (0, 1), colors.lightblue),  # 设置 Background 背景颜色为浅蓝色
+                ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+                ('FONTSIZE', (0, 0), (-1, -1), 8),  # 适当减小字体大小
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black),
+                ('WORDWRAP', (0, 0), (-1, -1), 'CJK'),  # 启用自动换行
+                ('VALIGN', (0, 0), (-1, -1), 'TOP'),  # 垂直顶部对齐，确保内容完整显示
+                ('LEFTPADDING', (0, 0), (-1, -1), 6),  # 添加左内边距
+                ('RIGHTPADDING', (0, 0), (-1, -1), 6),  # 添加右内边距
+            ]),
+            'test': TableStyle([
+                ('BACKGROUND', (0, 0), (0, 0), colors.lightblue),  # 设置 Test Area 背景颜色为浅蓝色
+                ('BACKGROUND', (2, 0), (2, 0), colors.lightblue),  # 设置 Mode 背景颜色为浅蓝色
+                ('BACKGROUND', (0, 1), (0, 1), colors.lightblue),  # 设置 Node Number 背景颜色为浅蓝色
+                ('BACKGROUND', (2, 1), (2, 1), colors.lightblue),  # 设置 FMEA# 背景颜色为浅蓝色
+                ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+                ('FONTSIZE', (0, 0), (-1, -1), 8),  # 适当减小字体大小
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black),
+                ('WORDWRAP', (0, 0), (-1, -1), 'CJK'),  # 启用自动换行
+                ('VALIGN', (0, 0), (-1, -1), 'TOP'),  # 垂直顶部对齐，确保内容完整显示
+                ('LEFTPADDING', (0, 0), (-1, -1), 6),  # 添加左内边距
+                ('RIGHTPADDING', (0, 0), (-1, -1), 6),  # 添加右内边距
+            ]),
+            # 设置表格样式，允许内容自动换行
+            'procedure': TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('ALIGN', (0, 1), (-1, -1), 'LEFT'),  # 修改表格内容为左对齐
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, -1), 8),  # 适当减小字体大小
+                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                ('BACKGROUND', (0, 1), (-1, -1), colors.white),  # 除第一行外，其余行背景设为白色
+                ('GRID', (0, 0), (-1, -1), 1, colors.black),
+                ('WORDWRAP', (0, 1), (-1, -1), 'CJK'),  # 启用自动换行
+                ('VALIGN', (0, 0), (-1, -1), 'TOP'),  # 垂直顶部对齐，确保内容完整显示
+                ('LEFTPADDING', (0, 0), (-1, -1), 6),  # 添加左内边距
+                ('RIGHTPADDING', (0, 0), (-1, -1), 6)  # 添加右内边距
+            ]),
+            'comments': TableStyle([
+                ('BACKGROUND', (0, 0), (-1, -1), colors.white),
+                ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, -1), 10),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+                ('BOX', (0, 0), (-1, -1), 1, colors.black),  # 只显示外边框
+                ('LEFTPADDING', (0, 0), (-1, -1), 6),  # 添加左内边距
+                ('RIGHTPADDING', (0, 0), (-1, -1), 6)  # 添加右内边距
+            ]),
+            'ewa': TableStyle([
+                ('BACKGROUND', (0, 0), (0, -1), colors.burlywood),  # 第一列背景设为棕黄色
+                ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, -1), 10),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 15),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black),  # 显示表格边框
+                ('LEFTPADDING', (0, 0), (-1, -1), 6),  # 添加左内边距
+                ('RIGHTPADDING', (0, 0), (-1, -1), 6)  # 添加右内边距
+            ]),
+        })
+        # 步骤段落样式，按序号位数缓存
+        self._bullet_styles = {}
+
+    def bullet(self, digit_count):
+        """
+        获取步骤段落的样式：悬挂缩进随序号位数调整，保证换行后文本首字对齐
+        :param digit_count: 序号的位数
+        :return: 段落样式
+        """
+        bullet_style = self._bullet_styles.get(digit_count)
+        if bullet_style is None:
+            from reportlab.lib.styles import ParagraphStyle
+
+            bullet_style = ParagraphStyle(
+                f'BulletStyle{digit_count}', parent=self.paragraph['body'],
+                # 动态调整 firstLineIndent 的值
+                firstLineIndent=-(SPACE_WIDTH + digit_count * DIGIT_WIDTH),
+                leftIndent=15,  # 正值用于缩进内容，保证换行后文本首字对齐
+                spaceBefore=6,  # 可以根据需要调整段落前间距
+                spaceAfter=6,  # 可以根据需要调整段落后续间距
+            )
+            self._bullet_styles[digit_count] = bullet_style
+        return bullet_style
+
+def get_pdf_styles():
+    """
+    获取共享的样式注册表，第一次调用时构建
+    :return: PdfStyles 对象
+    """
+    global _pdf_styles
+    if _pdf_styles is None:
+        _pdf_styles = PdfStyles()
+    return _pdf_styles
 
 def create_title_table(doc, title):
     """
@@ -23,23 +173,13 @@ def create_title_table(doc, title):
     :param title: 标题文本
     :return: 标题表格对象
     """
-    styles = getSampleStyleSheet()
-    # 调整小标题字体大小
-    title_style = styles['Heading1']
-    title_style.fontSize = 12
-    title = Paragraph(title, title_style)
+    from reportlab.platypus import Paragraph, Table
+
+    styles = get_pdf_styles()
+    title = Paragraph(title, styles.paragraph['title'])
     # 创建一个包含标题的表格，用于添加边框
     title_table = Table([[title]], colWidths=[doc.width])
-    title_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), colors.white),  # 背景颜色设为白色
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ('LINEABOVE', (0, 0), (-1, 0), 1, colors.lightblue),  # 上侧淡蓝色线条
-        ('LINELEFT', (0, 0), (0, -1), 1, colors.lightblue),  # 左侧淡蓝色线条，覆盖整个左侧
-    ]))
+    title_table.setStyle(styles.table['title'])
     return title_table
 
 def create_requirement_table(doc, requirement_purpose, background):
@@ -50,14 +190,13 @@ def create_requirement_table(doc, requirement_purpose, background):
     :param background: 背景信息
     :return: 需求表格对象
     """
-    styles = getSampleStyleSheet()
-    # 自定义段落样式，设置字体大小
-    custom_style = styles['Normal']
-    custom_style.fontSize = 8
+    from reportlab.platypus import Paragraph, Table
+
+    styles = get_pdf_styles()
     # 需求、背景部分生成表格
     requirement_data = [
         ["Requirement/Purpose", requirement_purpose],
-        ["Background", Paragraph(background, custom_style)]
+        ["Background", Paragraph(background, styles.paragraph['body'])]
     ]
     # 进一步调整列宽比例
     requirement_col_widths = [
@@ -65,20 +204,7 @@ def create_requirement_table(doc, requirement_purpose, background):
         doc.width * 0.8   # 第二列宽度
     ]
     requirement_table = Table(requirement_data, colWidths=requirement_col_widths)
-    requirement_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, 0), colors.lightblue),  # 设置 Requirement/Purpose 背景颜色为浅蓝色
-        ('BACKGROUND', (0, 1), (0, 1), colors.lightblue),  # 设置 Background 背景颜色为浅蓝色
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),  # 适当减小字体大小
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('WORDWRAP', (0, 0), (-1, -1), 'CJK'),  # 启用自动换行
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),  # 垂直顶部对齐，确保内容完整显示
-        ('LEFTPADDING', (0, 0), (-1, -1), 6),  # 添加左内边距
-        ('RIGHTPADDING', (0, 0), (-1, -1), 6),  # 添加右内边距
-    ]))
+    requirement_table.setStyle(styles.table['requirement'])
     return requirement_table
 
 def create_test_table(doc, test_area, mode, node_number, fmea):
@@ -91,10 +217,8 @@ def create_test_table(doc, test_area, mode, node_number, fmea):
     :param fmea: FMEA编号
     :return: 测试表格对象
     """
-    styles = getSampleStyleSheet()
-    # 自定义段落样式，设置字体大小
-    custom_style = styles['Normal']
-    custom_style.fontSize = 8
+    from reportlab.platypus import Table
+
     # 测试区域、模式和节点编号部分生成表格
     test_data = [
         ["Test Area", test_area, "Mode", mode],
@@ -108,70 +232,38 @@ def create_test_table(doc, test_area, mode, node_number, fmea):
         doc.width * 0.3   # 第四列宽度
     ]
     test_table = Table(test_data, colWidths=test_col_widths)
-    test_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, 0), colors.lightblue),  # 设置 Test Area 背景颜色为浅蓝色
-        ('BACKGROUND', (2, 0), (2, 0), colors.lightblue),  # 设置 Mode 背景颜色为浅蓝色
-        ('BACKGROUND', (0, 1), (0, 1), colors.lightblue),  # 设置 Node Number 背景颜色为浅蓝色
-        ('BACKGROUND', (2, 1), (2, 1), colors.lightblue),  # 设置 FMEA# 背景颜色为浅蓝色
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),  # 适当减小字体大小
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('WORDWRAP', (0, 0), (-1, -1), 'CJK'),  # 启用自动换行
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),  # 垂直顶部对齐，确保内容完整显示
-        ('LEFTPADDING', (0, 0), (-1, -1), 6),  # 添加左内边距
-        ('RIGHTPADDING', (0, 0), (-1, -1), 6),  # 添加右内边距
-    ]))
+    test_table.setStyle(get_pdf_styles().table['test'])
     return test_table
 
 def create_procedure_table(doc, steps):
     """
-    创建过程表格
+    创建过程表格；步骤数超过 LONG_TABLE_STEPS 时使用长表格模式，按页逐块排版（见 PdfFlowables.ChunkedTable）
     :param doc: 文档对象
     :param steps: 步骤列表
     :return: 过程表格对象
     """
-    styles = getSampleStyleSheet()
-    # 自定义段落样式，设置字体大小
-    custom_style = styles['Normal']
-    custom_style.fontSize = 8
-    data = [["Procedure", "Pass"]]
-    for i, step in enumerate(steps, start=1):
+    from reportlab.platypus import Paragraph, Table
+
+    styles = get_pdf_styles()
+
+    def step_row(index):
         # 把步骤内容中的换行符替换为 <br/>
-        step = step.replace('\n', '<br/>')
-        # 创建一个带缩进的段落
-        bullet_style = custom_style.clone('BulletStyle')
-        # 计算序号的位数
-        digit_count = len(str(i))
-        # 动态调整 firstLineIndent 的值
-        bullet_style.firstLineIndent = - (SPACE_WIDTH + digit_count * DIGIT_WIDTH)
-        bullet_style.leftIndent = 15  # 正值用于缩进内容，保证换行后文本首字对齐
-        bullet_style.spaceBefore = 6  # 可以根据需要调整段落前间距
-        bullet_style.spaceAfter = 6  # 可以根据需要调整段落后续间距
-        step_text = f"{i}. {step}"
-        step_paragraph = Paragraph(step_text, bullet_style)
-        data.append([step_paragraph, ""])
+        step = steps[index].replace('\n', '<br/>')
+        # 创建一个带缩进的段落，样式按序号的位数缓存
+        number = index + 1
+        step_paragraph = Paragraph(f"{number}. {step}", styles.bullet(len(str(number))))
+        return [step_paragraph, ""]
+
+    header = [["Procedure", "Pass"]]
     # 调整列宽比例为 9:1
     col_widths = [doc.width * 0.9, doc.width * 0.1]
+    if len(steps) > LONG_TABLE_STEPS:
+        from PdfFlowables import ChunkedTable
+
+        return ChunkedTable(header, len(steps), step_row, col_widths, styles.table['procedure'])
+    data = header + [step_row(i) for i in range(len(steps))]
     table = Table(data, colWidths=col_widths, repeatRows=1)  # 设置 repeatRows=1 使表头跨页显示
-    # 设置表格样式，允许内容自动换行
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('ALIGN', (0, 1), (-1, -1), 'LEFT'),  # 修改表格内容为左对齐
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),  # 适当减小字体大小
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.white),  # 除第一行外，其余行背景设为白色
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('WORDWRAP', (0, 1), (-1, -1), 'CJK'),  # 启用自动换行
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),  # 垂直顶部对齐，确保内容完整显示
-        ('LEFTPADDING', (0, 0), (-1, -1), 6),  # 添加左内边距
-        ('RIGHTPADDING', (0, 0), (-1, -1), 6)  # 添加右内边距
-    ]))
+    table.setStyle(styles.table['procedure'])
     return table
 
 def create_comments_table(doc):
@@ -180,10 +272,8 @@ def create_comments_table(doc):
     :param doc: 文档对象
     :return: 注释表格对象
     """
-    styles = getSampleStyleSheet()
-    # 自定义段落样式，设置字体大小
-    custom_style = styles['Normal']
-    custom_style.fontSize = 8
+    from reportlab.platypus import Table
+
     # 注释部分生成表格
     comments_data = [
         ["Comments/Notes:"],
@@ -193,17 +283,7 @@ def create_comments_table(doc):
     ]
     comments_col_widths = [doc.width]
     comments_table = Table(comments_data, colWidths=comments_col_widths)
-    comments_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), colors.white),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ('BOX', (0, 0), (-1, -1), 1, colors.black),  # 只显示外边框
-        ('LEFTPADDING', (0, 0), (-1, -1), 6),  # 添加左内边距
-        ('RIGHTPADDING', (0, 0), (-1, -1), 6)  # 添加右内边距
-    ]))
+    comments_table.setStyle(get_pdf_styles().table['comments'])
     return comments_table
 
 def create_ewa_table(doc):
@@ -212,10 +292,8 @@ def create_ewa_table(doc):
     :param doc: 文档对象
     :return: 执行、见证、批准表格对象
     """
-    styles = getSampleStyleSheet()
-    # 自定义段落样式，设置字体大小
-    custom_style = styles['Normal']
-    custom_style.fontSize = 8
+    from reportlab.platypus import Table
+
     # 执行、见证、批准部分生成表格
     executed_witnessed_approved_data = [
         ["Executed by :", "", "Date :", ""],
@@ -230,44 +308,63 @@ def create_ewa_table(doc):
         total_width * 2.5 / 10   # 第四列宽度
     ]
     ewa_table = Table(executed_witnessed_approved_data, colWidths=ewa_col_widths)
-    ewa_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.burlywood),  # 第一列背景设为棕黄色
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 15),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),  # 显示表格边框
-        ('LEFTPADDING', (0, 0), (-1, -1), 6),  # 添加左内边距
-        ('RIGHTPADDING', (0, 0), (-1, -1), 6)  # 添加右内边距
-    ]))
+    ewa_table.setStyle(get_pdf_styles().table['ewa'])
     return ewa_table
 
-# 修改函数，添加 steps 和 doc_name 参数
-def create_pdf(requirement_purpose, background, test_area, mode, node_number, fmea, title, steps, doc_name):
+# 静态块的排版结果，按可用宽度缓存，每个进程只排版一次
+_signoff_layouts = {}
+
+def create_signoff_block(doc, as_form=False):
     """
-    创建 PDF 文档
-    :param requirement_purpose: 需求目的
-    :param background: 背景信息
-    :param test_area: 测试区域
-    :param mode: 模式
-    :param node_number: 节点编号
-    :param fmea: FMEA编号
-    :param title: 标题
-    :param steps: 步骤列表
-    :param doc_name: 文档名称
+    创建注释表格和执行、见证、批准表格组成的静态块：内容与数据无关，每个进程只排版一次；
+    合并生成时绘制为表单（Form XObject），所有页面共用同一个表单
+    :param doc: 文档对象
+    :param as_form: 是否绘制为表单（同一个 PDF 中出现多次时使用）
+    :return: 静态块对象
+    """
+    from reportlab.platypus import Paragraph
+    from PdfFlowables import StaticBlock, StaticLayout
+
+    layout = _signoff_layouts.get(doc.width)
+    if layout is None:
+        # 添加有明确高度的空白段落用于分隔表格
+        spacer = Paragraph("<br/>" * 2, get_pdf_styles().paragraph['spacer'])  # 可调整 <br/> 的数量改变间距
+        layout = StaticLayout([create_comments_table(doc), spacer, create_ewa_table(doc)], doc.width)
+        _signoff_layouts[doc.width] = layout
+    return StaticBlock("CommentsAndSignOff", layout, as_form)
+
+def create_pdf_doc(target):
     """
+    创建设置好页面大小和边距的文档模板
+    :param target: 文件路径或可写的文件对象
+    :return: 文档模板对象
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate
+    from reportlab.lib.units import inch
+
     # 设置页面边距，使用传入的文件名
-    doc = SimpleDocTemplate(doc_name, pagesize=A4, leftMargin=0.5*inch, rightMargin=0.5*inch, topMargin=0.5*inch, bottomMargin=0.5*inch)
+    return SimpleDocTemplate(target, pagesize=A4, leftMargin=0.5*inch, rightMargin=0.5*inch, topMargin=0.5*inch, bottomMargin=0.5*inch)
+
+def build_story(doc, requirement_purpose, background, test_area, mode, node_number, fmea, title, steps,
+                shared_forms=False):
+    """
+    构建一份 PDF 的内容（以分页符结束）
+    :param doc: 文档模板对象，用于计算表格宽度
+    :param shared_forms: 静态内容绘制为共用的表单（多行生成到同一个 PDF 时使用）
+    :return: flowable 列表
+    """
+    from reportlab.platypus import Paragraph, PageBreak
+
     elements = []
-    styles = getSampleStyleSheet()
+    styles = get_pdf_styles().paragraph
 
     # 创建标题表格
     title_table = create_title_table(doc, title)
     elements.append(title_table)
 
     # 添加有明确高度的空白段落用于分隔表格
-    spacer = Paragraph("<br/>" * 1, styles['Heading1'])  # 可调整 <br/> 的数量改变间距
+    spacer = Paragraph("<br/>" * 1, styles['heading_spacer'])  # 可调整 <br/> 的数量改变间距
     elements.append(spacer)
 
     # 创建需求表格
@@ -279,7 +376,7 @@ def create_pdf(requirement_purpose, background, test_area, mode, node_number, fm
     elements.append(test_table)
 
     # 添加有明确高度的空白段落用于分隔表格
-    spacer = Paragraph("<br/>" * 2, styles['Normal'])  # 可调整 <br/> 的数量改变间距
+    spacer = Paragraph("<br/>" * 2, styles['spacer'])  # 可调整 <br/> 的数量改变间距
     elements.append(spacer)
 
     # 创建过程表格
@@ -287,27 +384,35 @@ def create_pdf(requirement_purpose, background, test_area, mode, node_number, fm
     elements.append(procedure_table)
 
     # 添加有明确高度的空白段落用于分隔表格
-    spacer = Paragraph("<br/>" * 2, styles['Normal'])  # 可调整 <br/> 的数量改变间距
+    spacer = Paragraph("<br/>" * 2, styles['spacer'])  # 可调整 <br/> 的数量改变间距
     elements.append(spacer)
 
-    # 创建注释表格
-    comments_table = create_comments_table(doc)
-
-    # 创建执行、见证、批准表格
-    ewa_table = create_ewa_table(doc)
-
-    # 添加有明确高度的空白段落用于分隔表格
-    spacer = Paragraph("<br/>" * 2, styles['Normal'])  # 可调整 <br/> 的数量改变间距
-
-    # 使用 KeepTogether 确保注释表格和 EWA 表格不跨页
-    from reportlab.platypus import KeepTogether
-    combined_elements = KeepTogether([comments_table, spacer, ewa_table])
-    elements.append(combined_elements)
+    # 注释表格和执行、见证、批准表格组成的静态块，不跨页
+    elements.append(create_signoff_block(doc, shared_forms))
 
     # 添加分页符（如果需要）
     elements.append(PageBreak())
+    return elements
+
+def create_pdf(requirement_purpose, background, test_area, mode, node_number, fmea, title, steps, doc_name):
+    """
+    创建 PDF 文档
+    :param requirement_purpose: 需求目的
+    :param background: 背景信息
+    :param test_area: 测试区域
+    :param mode: 模式
+    :param node_number: 节点编号
+    :param fmea: FMEA编号
+    :param title: 标题
+    :param steps: 步骤列表
+    :param doc_name: 文档名称（文件路径或可写的文件对象）
+    """
+    with stage("build_story"):
+        doc = create_pdf_doc(doc_name)
+        elements = build_story(doc, requirement_purpose, background, test_area, mode, node_number, fmea, title, steps)
 
-    doc.build(elements)
+    with stage("build"):
+        doc.build(elements)
 
 def sanitize_filename(filename):
     """
@@ -315,97 +420,478 @@ def sanitize_filename(filename):
     :param filename: 原始文件名
     :return: 处理后的文件名
     """
-    return re.sub(r'[\\/*?:"<>|]', '_', filename)
-
-def select_excel_file():
-    file_path = filedialog.askopenfilename(title="选择 Excel 文件", filetypes=[("Excel files", "*.xlsx")])
-    if file_path:
-        excel_path_entry.delete(0, tk.END)
-        excel_path_entry.insert(0, file_path)
-
-def select_output_directory():
-    dir_path = filedialog.askdirectory(title="选择保存 PDF 文件的目录")
-    if dir_path:
-        output_dir_entry.delete(0, tk.END)
-        output_dir_entry.insert(0, dir_path)
+    return _UNSAFE_FILENAME_CHARS.sub('_', filename)
 
-def convert_to_string(value):
+def open_pdf_source(excel_file_path):
     """
-    将值转换为字符串，如果值为 NaN 则转换为空字符串
-    :param value: 输入值
-    :return: 字符串类型的值
+    打开 Excel 并检查是否包含生成 PDF 所需的全部列（PDF_FIELDS），缺少时在生成任何 PDF 之前报错
+    :param excel_file_path: Excel 文件路径
+    :return: (ExcelRowSource, 从一行数据中按 PDF_FIELDS 顺序取出字段值元组的函数)
+    """
+    source = ExcelRowSource(excel_file_path)
+    missing = [field for field in PDF_FIELDS if field not in source.columns]
+    if missing:
+        source.close()
+        raise ValueError(f"Excel 中缺少生成 PDF 所需的列: {', '.join(missing)}")
+    # 列位置只查找一次，每行直接按位置取出字段元组，不再构建字典；
+    # ExcelRowSource 读到的值已经是字符串（空单元格为空字符串），无需再逐个转换
+    get_fields = itemgetter(*(source.columns.index(field) for field in PDF_FIELDS))
+    return source, get_fields
+
+def render_pdf(fields, target):
+    """
+    生成一行数据对应的 PDF
+    :param fields: 按 PDF_FIELDS 顺序排列的字段值
+    :param target: 文件路径或可写的文件对象
+    """
+    requirement_purpose, background, test_area, mode, node_number, fmea, title, steps_str = fields
+    create_pdf(
+        requirement_purpose,
+        background,
+        test_area,
+        mode,
+        node_number,
+        fmea,
+        title,
+        steps_str.split(';'),
+        target
+    )
+
+def _init_pdf_worker(timing):
+    if timing:
+        # 工作进程的分阶段计时随每批结果回传给主进程合并
+        enable_timing()
+
+def _render_pdf_chunk(chunk):
+    """
+    在工作进程中生成一批 PDF
+    :param chunk: [(行号, 字段值), ...]
+    :return: ([(行号, PDF 字节, 错误信息), ...], 本批的分阶段计时（未启用时为 None）)
+    """
+    results = []
+    for index, fields in chunk:
+        try:
+            buffer = BytesIO()
+            render_pdf(fields, buffer)
+            results.append((index, buffer.getvalue(), None))
+        except Exception as e:
+            results.append((index, None, str(e)))
+    timer = get_timer()
+    return results, None if timer is None else timer.take()
+
+def _iter_parallel_pdfs(jobs, workers, chunk_size):
+    """
+    按块并行生成 PDF，按行号顺序返回结果
+    :param jobs: 生成 (行号, 字段值)
+    :return: 生成 (行号, PDF 字节, 错误信息)
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from itertools import islice
+
+    timer = get_timer()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_pdf_worker,
+                             initargs=(timer is not None,)) as executor:
+        # 只保留有限数量的在途任务，避免一次性提交全部行
+        pending = []
+        jobs = iter(jobs)
+        while True:
+            while len(pending) < workers * 2:
+                chunk = list(islice(jobs, chunk_size))
+                if not chunk:
+                    break
+                pending.append(executor.submit(_render_pdf_chunk, chunk))
+            if not pending:
+                break
+            results, stats = pending.pop(0).result()
+            if stats:
+                timer.merge(stats)
+            yield from results
+
+def generate_pdfs(excel_file_path, save_directory, incremental=False, prune=False, timing=False,
+                  writer_threads=2, write_queue=8, archive_path=None, workers=1, chunk_size=8, progress=None):
+    """
+    根据 Excel 数据批量生成 PDF
+    :param excel_file_path: Excel 文件路径
+    :param save_directory: 保存 PDF 文件的目录
+    :param incremental: 增量生成，只重新生成数据或版式有变化、或输出文件缺失的行
+    :param prune: 增量生成时删除 Excel 中已不存在的行对应的 PDF
+    :param timing: 记录各阶段（读取 Excel、构建内容、生成 PDF）的耗时和调用次数，结束时输出汇总表
+    :param writer_threads: 后台写出 PDF 的线程数，0 表示在渲染线程中直接写出
+    :param write_queue: 等待后台写出的 PDF 数上限
+    :param archive_path: 压缩包路径，指定时所有 PDF 从内存直接写入该 .zip，不在目录中创建文件
+    :param workers: 工作进程数，1 为串行，0 表示使用全部 CPU 核心
+    :param chunk_size: 并行模式下每次分派给工作进程的行数
+    :param progress: 进度回调，每处理完一行调用一次 progress(已处理行数, 失败行数)
+    :return: 生成、失败（以及增量生成时跳过、删除）数量的统计信息
+    """
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    if archive_path and incremental:
+        raise ValueError("输出到压缩包时不支持增量生成")
+    timer = enable_timing() if timing else None
+    writer = None
+    try:
+        # 流式读取 Excel；先检查所需的列，缺少时不创建压缩包、不生成任何 PDF
+        with stage("read_excel"):
+            source, get_fields = open_pdf_source(excel_file_path)
+        if archive_path:
+            writer = ArchiveWriter(archive_path)
+        elif writer_threads > 0:
+            writer = BackgroundWriter(writer_threads, write_queue)
+        return _generate_pdfs(source, get_fields, save_directory, incremental, prune, writer,
+                              workers, chunk_size, progress)
+    finally:
+        if writer is not None:
+            # 出错提前结束时也要结束写出线程、关闭压缩包
+            writer.close()
+        if timer is not None:
+            disable_timing()
+            print(timer.format_table())
+
+def _iter_pdf_jobs(source, get_fields, save_directory, manifest, outputs):
+    """
+    读取 Excel 并按行号顺序分配输出文件名：标题相同的行依次追加 " (1)"、" (2)"，结果只与行顺序有关
+    :param get_fields: 从一行数据中取出字段值元组的函数（见 open_pdf_source）
+    :param outputs: 记录需要生成的行 {行号: (输出文件名, 行哈希)}
+    :return: 生成 (行号, 字段值)
+    """
+    # 本次运行中已使用的文件名（小写）
+    used_names = set()
+    for index, values in enumerate(timed_iter(source, "read_excel")):
+        fields = get_fields(values)
+        file_name = unique_name(f"{sanitize_filename(fields[6])}.pdf", used_names)
+        row_hash = None
+        if manifest is not None:
+            row_hash = manifest.row_hash(fields)
+            # 数据未变且上次的输出文件名与本次相同时跳过该行；文件名随前面的行变化时重新生成，与全新生成的结果相同
+            if manifest.is_current(row_hash, file_name):
+                continue
+        outputs[index] = (os.path.join(save_directory, file_name), row_hash)
+        yield index, fields
+
+def _generate_pdfs(source, get_fields, save_directory, incremental, prune, writer, workers, chunk_size, progress):
+    # 增量生成清单：只重新生成数据或版式有变化、或输出文件缺失的行
+    manifest = RenderManifest(save_directory, [LAYOUT_VERSION]) if incremental else None
+    outputs = {}
+    jobs = _iter_pdf_jobs(source, get_fields, save_directory, manifest, outputs)
+    done = failed = 0
+    # 渲染与写出流水线：生成好的 PDF 交给后台线程写入磁盘，或直接写入压缩包
+    try:
+        if workers > 1:
+            results = _iter_parallel_pdfs(jobs, workers, chunk_size)
+        else:
+            results = _iter_serial_pdfs(jobs, outputs, writer)
+        for index, data, error in results:
+            doc_name, row_hash = outputs.pop(index)
+            done += 1
+            if error is not None:
+                # 单行出错只记录该行，继续生成其余的行
+                failed += 1
+                logging.error(f"生成第 {index + 1} 个 PDF（{doc_name}）时出错: {error}")
+            else:
+                if data is not None:
+                    if writer is not None:
+                        # 队列已满时在此等待写出线程
+                        with stage("write_queue"):
+                            location = writer.write(doc_name, data)
+                        # 写入压缩包时使用 PDF 在压缩包中的位置
+                        if location is not None:
+                            doc_name = location
+                    else:
+                        with open(doc_name, "wb") as f:
+                            f.write(data)
+                logging.info(f"Generated PDF: {doc_name}")
+                if manifest is not None:
+                    manifest.record(row_hash, doc_name)
+            if progress is not None:
+                progress(done, failed)
+    finally:
+        if writer is not None:
+            with stage("write_wait"):
+                write_errors = writer.close()
+            # 写出失败的 PDF 计入失败数，且不记入清单，下次增量生成时重新生成
+            failed += len(write_errors)
+            for doc_name, error in write_errors:
+                if manifest is not None:
+                    manifest.discard(doc_name)
+    summary = f"生成 {done - failed} 个，失败 {failed} 个"
+    if manifest is not None:
+        manifest.save(prune)
+        summary = f"{summary}；{manifest.summary()}"
+    logging.info(summary)
+    return summary
+
+def _iter_serial_pdfs(jobs, outputs, writer):
+    """
+    在当前进程中逐行生成 PDF
+    :return: 生成 (行号, PDF 字节（直接写入文件时为 None）, 错误信息)
+    """
+    for index, fields in jobs:
+        try:
+            if writer is not None:
+                # 使用后台写出时先生成到内存
+                buffer = BytesIO()
+                render_pdf(fields, buffer)
+                yield index, buffer.getbuffer(), None
+            else:
+                render_pdf(fields, outputs[index][0])
+                yield index, None, None
+        except Exception as e:
+            yield index, None, str(e)
+
+class _LazyStory(list):
+    """
+    按需生成内容的 story：ReportLab 排版时每处理一个 flowable 都会检查 len(story)，
+    剩余内容为空时再取下一行的内容，内存中只保留当前行的 flowable
     """
-    return str(value) if pd.notna(value) else ""
-
-def generate_pdfs():
-    excel_file_path = excel_path_entry.get()
-    save_directory = output_dir_entry.get()
-
-    if not excel_file_path or not save_directory:
-        messagebox.showerror("错误", "请选择 Excel 文件和保存目录")
-        return
 
+    def __init__(self, rows):
+        """
+        :param rows: 生成每行的 flowable 列表
+        """
+        super().__init__()
+        self._rows = rows
+
+    def __len__(self):
+        while not list.__len__(self) and self._rows is not None:
+            elements = next(self._rows, None)
+            if elements is None:
+                self._rows = None
+            else:
+                self.extend(elements)
+        return list.__len__(self)
+
+def generate_combined_pdf(excel_file_path, output_file, timing=False, progress=None):
+    """
+    将所有行依次排版到同一个 PDF 中（一次 build），每行的 “标题.pdf” 作为书签，
+    与先逐行生成 PDF 再用 PDFMerge.py 合并的结果相同，省去逐个写出和再次读取合并的步骤
+    :param excel_file_path: Excel 文件路径
+    :param output_file: 合并后的 PDF 文件路径
+    :param timing: 记录各阶段的耗时和调用次数，结束时输出汇总表
+    :param progress: 进度回调，每处理完一行调用一次 progress(已处理行数, 失败行数)
+    :return: 生成、失败数量的统计信息
+    """
+    timer = enable_timing() if timing else None
     try:
-        df = pd.read_excel(excel_file_path)
-        for index, row in df.iterrows():
-            # 确保所有需要的参数都是字符串类型
-            requirement_purpose = convert_to_string(row['requirement_purpose'])
-            background = convert_to_string(row['background'])
-            test_area = convert_to_string(row['test_area'])
-            mode = convert_to_string(row['mode'])
-            node_number = convert_to_string(row['node_number'])
-            fmea = convert_to_string(row['fmea'])
-            title = convert_to_string(row['title'])
-            steps_str = convert_to_string(row['steps'])
-            steps = steps_str.split(';')
-            sanitized_title = sanitize_filename(title)
-            doc_name = os.path.join(save_directory, f"{sanitized_title}.pdf")
-            create_pdf(
-                requirement_purpose,
-                background,
-                test_area,
-                mode,
-                node_number,
-                fmea,
-                title,
-                steps,
-                doc_name
-            )
-            logging.info(f"Generated PDF: {doc_name}")
-        messagebox.showinfo("完成", "PDF 文件生成完成")
+        return _generate_combined_pdf(excel_file_path, output_file, progress)
+    finally:
+        if timer is not None:
+            disable_timing()
+            print(timer.format_table())
+
+def _generate_combined_pdf(excel_file_path, output_file, progress):
+    with stage("read_excel"):
+        source, get_fields = open_pdf_source(excel_file_path)
+    doc = create_pdf_doc(output_file)
+    # 已处理和失败的行数
+    counts = [0, 0]
+
+    def after_flowable(flowable):
+        # 每行的标题表格排版后，在所在页添加书签
+        entry = getattr(flowable, '_outline_entry', None)
+        if entry is not None:
+            key, title = entry
+            doc.canv.bookmarkPage(key)
+            doc.canv.addOutlineEntry(title, key, level=0)
+
+    doc.afterFlowable = after_flowable
+
+    def iter_rows():
+        # 书签名与逐行生成时的文件名相同，标题相同的行依次追加 " (1)"、" (2)"
+        used_names = set()
+        for index, values in enumerate(timed_iter(source, "read_excel")):
+            fields = get_fields(values)
+            name = unique_name(f"{sanitize_filename(fields[6])}.pdf", used_names)
+            counts[0] += 1
+            try:
+                with stage("build_story"):
+                    elements = build_story(doc, *fields[:7], fields[7].split(';'), shared_forms=True)
+            except Exception as e:
+                # 单行出错只记录该行，继续生成其余的行
+                counts[1] += 1
+                logging.error(f"生成第 {index + 1} 个 PDF（{name}）时出错: {e}")
+                elements = None
+            if progress is not None:
+                progress(counts[0], counts[1])
+            if elements is not None:
+                elements[0]._outline_entry = (f"row{index}", name)
+                yield elements
+
+    with stage("build"):
+        doc.build(_LazyStory(iter_rows()))
+    summary = f"生成 {counts[0] - counts[1]} 个，失败 {counts[1]} 个，已合并到 {output_file}"
+    logging.info(summary)
+    return summary
+
+def run_gui():
+    """
+    运行图形界面
+    """
+    import tkinter as tk
+    from tkinter import filedialog, messagebox
+
+    def select_excel_file():
+        file_path = filedialog.askopenfilename(title="选择 Excel 文件", filetypes=[("Excel files", "*.xlsx")])
+        if file_path:
+            excel_path_entry.delete(0, tk.END)
+            excel_path_entry.insert(0, file_path)
+
+    def select_output_directory():
+        dir_path = filedialog.askdirectory(title="选择保存 PDF 文件的目录")
+        if dir_path:
+            output_dir_entry.delete(0, tk.END)
+            output_dir_entry.insert(0, dir_path)
+
+    def run_generation():
+        excel_file_path = excel_path_entry.get()
+        save_directory = output_dir_entry.get()
+
+        if not excel_file_path or not save_directory:
+            messagebox.showerror("错误", "请选择 Excel 文件和保存目录")
+            return
+
+        # 已处理和失败的行数
+        counts = [0, 0]
+
+        def show_progress(done, failed):
+            counts[:] = [done, failed]
+            progress_var.set(f"已处理 {done} 行，失败 {failed} 行")
+            root.update_idletasks()
+
+        try:
+            if combined_var.get():
+                # 所有行生成到保存目录中的同一个 PDF
+                summary = generate_combined_pdf(excel_file_path, os.path.join(save_directory, COMBINED_PDF_NAME),
+                                                progress=show_progress)
+            else:
+                workers = int(workers_entry.get() or 1)
+                summary = generate_pdfs(excel_file_path, save_directory,
+                                        incremental=incremental_var.get(), prune=prune_var.get(),
+                                        workers=workers, progress=show_progress)
+            progress_var.set(summary)
+            if counts[1]:
+                # 出错的行已逐行记录在日志中，其余的行照常生成
+                messagebox.showwarning("完成", f"PDF 文件生成完成，部分行出错，详见日志\n{summary}")
+            else:
+                messagebox.showinfo("完成", f"PDF 文件生成完成\n{summary}")
+        except Exception as e:
+            messagebox.showerror("错误", f"生成 PDF 时出现错误: {str(e)}")
+
+    # 创建主窗口
+    root = tk.Tk()
+    root.title("PDF 生成器")
+
+    # 创建选择 Excel 文件的组件
+    excel_path_label = tk.Label(root, text="选择 Excel 文件:")
+    excel_path_label.pack(pady=10)
+
+    excel_path_entry = tk.Entry(root, width=50)
+    excel_path_entry.pack(pady=5)
+
+    excel_select_button = tk.Button(root, text="选择文件", command=select_excel_file)
+    excel_select_button.pack(pady=5)
+
+    # 创建选择输出目录的组件
+    output_dir_label = tk.Label(root, text="选择保存目录:")
+    output_dir_label.pack(pady=10)
+
+    output_dir_entry = tk.Entry(root, width=50)
+    output_dir_entry.pack(pady=5)
+
+    output_dir_select_button = tk.Button(root, text="选择目录", command=select_output_directory)
+    output_dir_select_button.pack(pady=5)
+
+    # 增量生成选项
+    incremental_var = tk.BooleanVar(value=False)
+    incremental_checkbox = tk.Checkbutton(root, text="增量生成（只生成有变化的行）", variable=incremental_var)
+    incremental_checkbox.pack(pady=5)
+    prune_var = tk.BooleanVar(value=False)
+    prune_checkbox = tk.Checkbutton(root, text="删除已不存在的行对应的 PDF", variable=prune_var)
+    prune_checkbox.pack(pady=5)
+
+    # 合并生成选项
+    combined_var = tk.BooleanVar(value=False)
+    combined_checkbox = tk.Checkbutton(root, text=f"生成为一个合并的 PDF（{COMBINED_PDF_NAME}）", variable=combined_var)
+    combined_checkbox.pack(pady=5)
+
+    # 并行进程数输入框
+    workers_label = tk.Label(root, text="并行进程数（1 为串行，0 为全部核心）:")
+    workers_label.pack(pady=5)
+    workers_entry = tk.Entry(root, width=10)
+    workers_entry.insert(0, "1")
+    workers_entry.pack(pady=5)
+
+    # 创建生成 PDF 的按钮
+    generate_button = tk.Button(root, text="生成 PDF", command=run_generation)
+    generate_button.pack(pady=20)
+
+    # 进度显示
+    progress_var = tk.StringVar(value="")
+    progress_label = tk.Label(root, textvariable=progress_var)
+    progress_label.pack(pady=5)
+
+    # 运行主循环
+    root.mainloop()
+
+def build_parser(prog=None):
+    """
+    构建命令行参数解析器
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(prog=prog, description="根据 Excel 数据批量生成 PDF 文件。不带参数时启动图形界面。")
+    parser.add_argument("--gui", action="store_true", help="启动图形界面")
+    parser.add_argument("--excel", help="Excel 文件路径（.xlsx）")
+    parser.add_argument("--output", help="保存 PDF 文件的目录")
+    parser.add_argument("--incremental", action="store_true", help="增量生成：只重新生成有变化或输出缺失的行")
+    parser.add_argument("--prune", action="store_true", help="增量生成时删除已不存在的行对应的 PDF")
+    parser.add_argument("--workers", type=int, default=1, help="工作进程数，1 为串行，0 表示使用全部 CPU 核心")
+    parser.add_argument("--chunk-size", type=int, default=8, help="并行模式下每次分派给工作进程的行数")
+    parser.add_argument("--writer-threads", type=int, default=2, help="后台写出 PDF 的线程数，0 表示生成后直接写出")
+    parser.add_argument("--write-queue", type=int, default=8, help="等待后台写出的 PDF 数上限（限制内存占用）")
+    parser.add_argument("--archive", metavar="ZIP", help="将所有 PDF 直接写入该 .zip 压缩包，不在目录中创建文件")
+    parser.add_argument("--combined", metavar="PDF",
+                        help="将所有行生成到这一个 PDF 中，每行的标题作为书签（代替逐行生成后再合并）")
+    parser.add_argument("--timing", action="store_true", help="输出各阶段的耗时和调用次数汇总表")
+    parser.add_argument("--profile", metavar="FILE", help="使用 cProfile 分析整个运行过程，保存为 pstats 文件")
+    return parser
+
+def main(argv=None, prog=None):
+    """
+    命令行入口：带 --excel / --output 时以无界面模式运行，否则启动图形界面
+    """
+    parser = build_parser(prog)
+    args = parser.parse_args(argv)
+    if args.gui or not (args.excel or args.output):
+        run_gui()
+        return 0
+    if not args.excel or not (args.output or args.archive or args.combined):
+        parser.error("无界面模式需要同时指定 --excel 和 --output（或 --archive、--combined）")
+
+    if args.combined:
+        try:
+            summary = run_profiled(args.profile, generate_combined_pdf, args.excel, args.combined, timing=args.timing)
+        except Exception as e:
+            logging.error(f"生成 PDF 时出现错误: {str(e)}")
+            return 1
+        print(f"PDF 文件生成完成：{summary}")
+        return 0
+
+    if not args.archive:
+        os.makedirs(args.output, exist_ok=True)
+    try:
+        summary = run_profiled(args.profile, generate_pdfs, args.excel, args.output or "",
+                               incremental=args.incremental, prune=args.prune, timing=args.timing,
+                               writer_threads=args.writer_threads, write_queue=args.write_queue,
+                               archive_path=args.archive, workers=args.workers, chunk_size=args.chunk_size)
     except Exception as e:
-        messagebox.showerror("错误", f"生成 PDF 时出现错误: {str(e)}")
+        logging.error(f"生成 PDF 时出现错误: {str(e)}")
+        return 1
+    print(f"PDF 文件生成完成：{summary}")
+    return 0
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# 创建主窗口
-root = tk.Tk()
-root.title("PDF 生成器")
-
-# 创建选择 Excel 文件的组件
-excel_path_label = tk.Label(root, text="选择 Excel 文件:")
-excel_path_label.pack(pady=10)
-
-excel_path_entry = tk.Entry(root, width=50)
-excel_path_entry.pack(pady=5)
-
-excel_select_button = tk.Button(root, text="选择文件", command=select_excel_file)
-excel_select_button.pack(pady=5)
-
-# 创建选择输出目录的组件
-output_dir_label = tk.Label(root, text="选择保存目录:")
-output_dir_label.pack(pady=10)
-
-output_dir_entry = tk.Entry(root, width=50)
-output_dir_entry.pack(pady=5)
-
-output_dir_select_button = tk.Button(root, text="选择目录", command=select_output_directory)
-output_dir_select_button.pack(pady=5)
-
-# 创建生成 PDF 的按钮
-generate_button = tk.Button(root, text="生成 PDF", command=generate_pdfs)
-generate_button.pack(pady=20)
-
-# 运行主循环
-root.mainloop()
\ No newline at end of file
+if __name__ == "__main__":
+    sys.exit(main())
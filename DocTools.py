@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+import sys
+
+# 子命令：(模块名, 说明)。模块只在执行对应子命令时导入，
+# 因此 --help 和参数错误不会加载 python-docx、openpyxl、reportlab、PyPDF2、tkinter 等重量级依赖
+COMMANDS = {
+    "generate-docx": ("CreateDocx", "根据 Excel 数据和 Word 模板批量生成 Word 文档"),
+    "generate-pdf": ("CreatePDF", "根据 Excel 数据批量生成 PDF 文档"),
+    "merge-docx": ("WordMerge", "合并文件夹中的 Word 文档"),
+    "merge-pdf": ("PDFMerge", "合并文件夹中的 PDF 文件"),
+    "scan": ("GetFileName", "扫描文件夹中的文件并按文件名自然数序排序"),
+}
+
+
+def build_parser():
+    import argparse
+
+    commands = "\n".join(f"  {name:<15}{help_text}" for name, (_, help_text) in COMMANDS.items())
+    parser = argparse.ArgumentParser(
+        prog="DocTools.py",
+        description="文档批处理工具的统一命令行入口，各子命令的参数见 DocTools.py <子命令> --help",
+        epilog=f"子命令:\n{commands}",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("command", choices=COMMANDS, metavar="<子命令>", help="要执行的子命令，见下方列表")
+    # 子命令之后的参数原样交给对应模块的 main() 解析
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="子命令的参数")
+    return parser
+
+
+def main(argv=None):
+    import importlib
+
+    args = build_parser().parse_args(argv)
+    module = importlib.import_module(COMMANDS[args.command][0])
+    return module.main(args.args, prog=f"DocTools.py {args.command}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+import copy
+import struct
+import zipfile
+import zlib
+
+# ZIP 格式中各结构的签名
+_LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+_CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+_END_RECORD = struct.Struct("<IHHHHIIH")
+_LOCAL_SIGNATURE = 0x04034b50
+_CENTRAL_SIGNATURE = 0x02014b50
+_END_SIGNATURE = 0x06054b50
+# 超过该值需要 ZIP64 扩展，快速写入不支持
+_ZIP64_LIMIT = 0xFFFFFFFF
+# 标志位：bit 3 表示使用数据描述符，bit 11 表示文件名为 UTF-8 编码
+_FLAG_DATA_DESCRIPTOR = 0x08
+_FLAG_UTF8 = 0x800
+
+
+class _Member:
+    """
+    模板压缩包中的一个成员，保存已压缩的原始字节，写出时直接复制
+    """
+
+    def __init__(self, info, raw):
+        self.name = info.filename
+        self.encoded_name = info.filename.encode("utf-8")
+        self.flag_bits = info.flag_bits & ~_FLAG_DATA_DESCRIPTOR
+        if not info.filename.isascii():
+            self.flag_bits |= _FLAG_UTF8
+        self.dos_time = (info.date_time[3] << 11) | (info.date_time[4] << 5) | (info.date_time[5] // 2)
+        self.dos_date = ((info.date_time[0] - 1980) << 9) | (info.date_time[1] << 5) | info.date_time[2]
+        self.external_attr = info.external_attr
+        self.set_data(info.compress_type, info.CRC, info.file_size, raw)
+
+    def set_data(self, compress_type, crc, file_size, raw):
+        self.compress_type = compress_type
+        self.crc = crc
+        self.file_size = file_size
+        self.compress_size = len(raw)
+        # 本地文件头不含偏移量，可与压缩数据一起预先拼好
+        self.local_record = _LOCAL_HEADER.pack(
+            _LOCAL_SIGNATURE, 20, self.flag_bits, self.compress_type, self.dos_time, self.dos_date,
+            self.crc, self.compress_size, self.file_size, len(self.encoded_name), 0,
+        ) + self.encoded_name + raw
+
+    def replaced(self, crc, file_size, raw):
+        """
+        返回内容被替换后的成员副本（使用 deflate 压缩的数据）
+        """
+        member = copy.copy(self)
+        member.set_data(zipfile.ZIP_DEFLATED, crc, file_size, raw)
+        return member
+
+    def central_record(self, offset):
+        return _CENTRAL_HEADER.pack(
+            _CENTRAL_SIGNATURE, 20, 20, self.flag_bits, self.compress_type, self.dos_time, self.dos_date,
+            self.crc, self.compress_size, self.file_size, len(self.encoded_name), 0, 0, 0, 0,
+            self.external_attr, offset,
+        ) + self.encoded_name
+
+
+class DocxZipWriter:
+    """
+    .docx 快速写出：模板中未改动的成员直接复制已压缩的原始字节（不重新压缩），
+    只压缩被替换的部件（如 word/document.xml）
+    """
+
+    def __init__(self, template_path, compresslevel=6):
+        """
+        :param template_path: 模板文件路径
+        :param compresslevel: 被替换部件的压缩级别（0-9），级别越低越快、文件越大
+        """
+        self.compresslevel = compresslevel
+        self.members = []
+        with open(template_path, "rb") as f, zipfile.ZipFile(f) as zf:
+            for info in zf.infolist():
+                if info.compress_size >= _ZIP64_LIMIT or info.file_size >= _ZIP64_LIMIT:
+                    raise ValueError(f"模板中的 {info.filename} 过大，不支持快速写出")
+                # 跳过本地文件头，读取已压缩的原始数据
+                f.seek(info.header_offset)
+                header = f.read(_LOCAL_HEADER.size)
+                name_length, extra_length = struct.unpack("<HH", header[26:30])
+                f.seek(info.header_offset + _LOCAL_HEADER.size + name_length + extra_length)
+                self.members.append(_Member(info, f.read(info.compress_size)))
+        self.names = {member.name for member in self.members}
+
+    def _compress(self, data):
+        compressor = zlib.compressobj(self.compresslevel, zlib.DEFLATED, -15)
+        return compressor.compress(data) + compressor.flush()
+
+    def _compress_chunks(self, chunks):
+        """
+        :return: (CRC, 未压缩的长度, 压缩后的字节)
+        """
+        compressor = zlib.compressobj(self.compresslevel, zlib.DEFLATED, -15)
+        crc = 0
+        size = 0
+        compressed = []
+        for chunk in chunks:
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+            compressed.append(compressor.compress(chunk))
+        compressed.append(compressor.flush())
+        if size >= _ZIP64_LIMIT:
+            raise ValueError("部件过大，不支持快速写出")
+        return crc, size, b"".join(compressed)
+
+    def write(self, file, parts):
+        """
+        写出文档
+        :param file: 输出文件路径或可写的文件对象
+        :param parts: 被替换的部件 {成员名: 未压缩的字节}，成员名必须已存在于模板中；
+                      也可以是逐块产出字节的可迭代对象（边读取边压缩，按 parts 的顺序依次读取）
+        :return: 写出的字节数
+        """
+        replaced = {}
+        for name, data in parts.items():
+            if name not in self.names:
+                raise KeyError(f"模板中不存在部件 {name}")
+            if isinstance(data, bytes):
+                replaced[name] = (zlib.crc32(data), len(data), self._compress(data))
+            else:
+                replaced[name] = self._compress_chunks(data)
+
+        if isinstance(file, (str, bytes)) or hasattr(file, "__fspath__"):
+            with open(file, "wb") as f:
+                return self._write_members(f, replaced)
+        return self._write_members(file, replaced)
+
+    def _write_members(self, f, replaced):
+        offset = 0
+        central = []
+        for member in self.members:
+            if member.name in replaced:
+                member = member.replaced(*replaced[member.name])
+            central.append(member.central_record(offset))
+            f.write(member.local_record)
+            offset += len(member.local_record)
+        if offset >= _ZIP64_LIMIT:
+            raise ValueError("输出文件过大，不支持快速写出")
+        central_data = b"".join(central)
+        f.write(central_data)
+        f.write(_END_RECORD.pack(_END_SIGNATURE, 0, 0, len(central), len(central), len(central_data), offset, 0))
+        return offset + len(central_data) + _END_RECORD.size
@@ -0,0 +1,120 @@
+import os
+
+
+def normalize_cell_value(value):
+    """
+    规范化单元格的值：空单元格转换为空字符串，整数值的浮点数转换为整数（与 pandas 读取结果一致）
+    :param value: openpyxl 读取到的值
+    :return: 字符串类型的值
+    """
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        if value != value:  # NaN
+            return ""
+        if value.is_integer():
+            value = int(value)
+    return str(value)
+
+
+def normalize_columns(header):
+    """
+    根据表头生成列名：空表头命名为 "Unnamed: 序号"，重复的列名依次追加 ".1"、".2"，
+    追加后与其他列名重复时继续递增（与 pandas 的列名规则一致，有名称的列先于空表头处理）
+    :param header: 表头行的值
+    :return: 列名列表
+    """
+    columns = []
+    unnamed = []
+    for i, value in enumerate(header):
+        if value is None or value == "":
+            columns.append(f"Unnamed: {i}")
+            unnamed.append(i)
+        else:
+            columns.append(normalize_cell_value(value))
+    original = set(columns)
+    unnamed_set = set(unnamed)
+    counts = {}
+    for i in [i for i in range(len(columns)) if i not in unnamed_set] + unnamed:
+        name = base = columns[i]
+        count = counts.get(name, 0)
+        while count > 0:
+            counts[base] = count + 1
+            name = f"{base}.{count}"
+            # 表头中已有的列名不能占用
+            count = count + 1 if name in original else counts.get(name, 0)
+        columns[i] = name
+        counts[name] = count + 1
+    return columns
+
+
+class ExcelRowSource:
+    """
+    流式读取 Excel 工作表（openpyxl 只读模式），逐行产出已转换为字符串的数据，
+    空单元格已转换为空字符串，内存占用与表格行数无关
+    """
+
+    def __init__(self, excel_path):
+        if not os.path.exists(excel_path):
+            raise FileNotFoundError(f"Excel文件未找到: {excel_path}")
+        self.excel_path = excel_path
+        # 打开工作簿（会加载共享字符串表）的开销较大，读取表头后保留给第一次迭代使用
+        self._workbook = self._open()
+        # 与 pd.read_excel 相同，读取第一个工作表（而不是保存时选中的工作表）
+        header = next(self._workbook.worksheets[0].iter_rows(max_row=1, values_only=True), ())
+        # 去掉表头末尾的空列
+        header = list(header)
+        while header and (header[-1] is None or header[-1] == ""):
+            header.pop()
+        self.columns = normalize_columns(header)
+        # 列名只转换一次为 {{列名}} 形式的占位符
+        self.placeholders = [f"{{{{{col}}}}}" for col in self.columns]
+
+    def _open(self):
+        from openpyxl import load_workbook
+
+        return load_workbook(self.excel_path, read_only=True, data_only=True)
+
+    def __iter__(self):
+        """
+        逐行产出数据元组，元组顺序与 columns 一致；末尾的空行会被忽略
+        """
+        width = len(self.columns)
+        if not width:
+            self.close()
+            return
+        empty_row = ("",) * width
+        workbook, self._workbook = self._workbook or self._open(), None
+        try:
+            rows = workbook.worksheets[0].iter_rows(min_row=2, max_col=width, values_only=True)
+            # 连续空行先计数，后面出现非空行时再输出，从而忽略末尾的空行
+            pending_empty = 0
+            for row in rows:
+                values = tuple(normalize_cell_value(value) for value in row)
+                if len(values) < width:
+                    values += ("",) * (width - len(values))
+                if values == empty_row:
+                    pending_empty += 1
+                    continue
+                for _ in range(pending_empty):
+                    yield empty_row
+                pending_empty = 0
+                yield values
+        finally:
+            workbook.close()
+
+    def close(self):
+        """
+        关闭尚未迭代使用的工作簿
+        """
+        if self._workbook is not None:
+            self._workbook.close()
+            self._workbook = None
+
+    def iter_placeholder_dicts(self):
+        """
+        逐行产出占位符字典 {"{{列名}}": 值}
+        """
+        placeholders = self.placeholders
+        for values in self:
+            yield dict(zip(placeholders, values))
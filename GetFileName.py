@@ -2,10 +2,94 @@
 import os
 import sys
 import re
-import tkinter as tk
-from tkinter import filedialog, messagebox, ttk
 from datetime import datetime
 
+# tkinter 只在启动图形界面时导入（见 run_gui）
+tk = ttk = filedialog = messagebox = None
+
+
+def natural_sort_key(s):
+    """用于自然数排序的键生成函数"""
+    # 提取文件名（不包括路径）
+    filename = os.path.basename(s)
+    # 将字符串分割成数字和非数字部分
+    return [int(text) if text.isdigit() else text.lower() for text in re.split('(\\d+)', filename)]
+
+
+def scan_folder(folder_path):
+    """扫描文件夹中的所有文件，按文件名自然数序排序"""
+    scanned_files = []
+    for root_dir, dirs, files in os.walk(folder_path):
+        for file in files:
+            scanned_files.append(os.path.join(root_dir, file))
+    scanned_files.sort(key=natural_sort_key)
+    return scanned_files
+
+
+def format_file_path(file_path, show_path=True, show_extension=True):
+    """根据显示选项格式化文件路径"""
+    if show_path:
+        if show_extension:
+            # 显示完整路径和扩展名
+            return file_path
+        else:
+            # 显示完整路径但不显示扩展名
+            base_name = os.path.basename(file_path)
+            name_without_ext = os.path.splitext(base_name)[0]
+            dir_name = os.path.dirname(file_path)
+            return os.path.join(dir_name, name_without_ext)
+    else:
+        base_name = os.path.basename(file_path)
+        if show_extension:
+            # 只显示文件名和扩展名
+            return base_name
+        else:
+            # 只显示文件名不显示扩展名
+            return os.path.splitext(base_name)[0]
+
+
+def write_file_list(file_path, scanned_files, file_format, scan_path, show_path=True, show_extension=True):
+    """将扫描结果保存为 txt、csv 或 json 文件"""
+    if file_format == "txt":
+        # 保存为文本文件
+        with open(file_path, 'w', encoding='utf-8') as f:
+            for file in scanned_files:
+                f.write(f"{format_file_path(file, show_path, show_extension)}\n")
+    elif file_format == "csv":
+        # 保存为CSV文件
+        with open(file_path, 'w', encoding='utf-8') as f:
+            # 写入CSV标题
+            f.write("文件名,完整路径\n")
+            for file in scanned_files:
+                file_name = os.path.basename(file)
+                if not show_extension:
+                    file_name = os.path.splitext(file_name)[0]
+                # 确保CSV格式正确（处理包含逗号的文件名）
+                f.write(f'"{file_name}","{file}"\n')
+    elif file_format == "json":
+        # 保存为JSON文件
+        import json
+        # 准备JSON数据
+        # 根据显示选项准备显示文件列表
+        display_files = []
+        for file in scanned_files:
+            display_files.append(format_file_path(file, show_path, show_extension))
+
+        json_data = {
+            "scan_time": datetime.now().isoformat(),
+            "scan_path": scan_path,
+            "file_count": len(scanned_files),
+            "display_options": {
+                "show_full_path": show_path,
+                "show_extension": show_extension
+            },
+            "original_files": scanned_files,
+            "display_files": display_files
+        }
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(json_data, f, ensure_ascii=False, indent=2)
+
+
 class FileScannerApp:
     def __init__(self, root):
         self.root = root
@@ -127,34 +211,11 @@ class FileScannerApp:
     
     def format_file_path(self, file_path):
         """根据复选框状态格式化文件路径"""
-        show_path = self.show_path_var.get()
-        show_extension = self.show_extension_var.get()
-        
-        if show_path:
-            if show_extension:
-                # 显示完整路径和扩展名
-                return file_path
-            else:
-                # 显示完整路径但不显示扩展名
-                base_name = os.path.basename(file_path)
-                name_without_ext = os.path.splitext(base_name)[0]
-                dir_name = os.path.dirname(file_path)
-                return os.path.join(dir_name, name_without_ext)
-        else:
-            base_name = os.path.basename(file_path)
-            if show_extension:
-                # 只显示文件名和扩展名
-                return base_name
-            else:
-                # 只显示文件名不显示扩展名
-                return os.path.splitext(base_name)[0]
+        return format_file_path(file_path, self.show_path_var.get(), self.show_extension_var.get())
     
     def natural_sort_key(self, s):
         """用于自然数排序的键生成函数"""
-        # 提取文件名（不包括路径）
-        filename = os.path.basename(s)
-        # 将字符串分割成数字和非数字部分
-        return [int(text) if text.isdigit() else text.lower() for text in re.split('(\\d+)', filename)]
+        return natural_sort_key(s)
     
     def scan_files(self):
         folder_path = self.folder_path_var.get()
@@ -172,14 +233,8 @@ class FileScannerApp:
         self.scanned_files = []
         
         try:
-            # 扫描文件夹中的所有文件
-            for root_dir, dirs, files in os.walk(folder_path):
-                for file in files:
-                    file_path = os.path.join(root_dir, file)
-                    self.scanned_files.append(file_path)
-            
-            # 按文件名进行自然数序排序
-            self.scanned_files.sort(key=self.natural_sort_key)
+            # 扫描文件夹中的所有文件，按文件名进行自然数序排序
+            self.scanned_files = scan_folder(folder_path)
             
             # 显示排序后的结果
             for file_path in self.scanned_files:
@@ -218,60 +273,8 @@ class FileScannerApp:
             return  # 用户取消保存
         
         try:
-            show_path = self.show_path_var.get()
-            show_extension = self.show_extension_var.get()
-            
-            if file_format == "txt":
-                # 保存为文本文件
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    for file in self.scanned_files:
-                        if show_path:
-                            if show_extension:
-                                f.write(f"{file}\n")
-                            else:
-                                base_name = os.path.basename(file)
-                                name_without_ext = os.path.splitext(base_name)[0]
-                                dir_name = os.path.dirname(file)
-                                f.write(f"{os.path.join(dir_name, name_without_ext)}\n")
-                        else:
-                            base_name = os.path.basename(file)
-                            if show_extension:
-                                f.write(f"{base_name}\n")
-                            else:
-                                f.write(f"{os.path.splitext(base_name)[0]}\n")
-            elif file_format == "csv":
-                # 保存为CSV文件
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    # 写入CSV标题
-                    f.write("文件名,完整路径\n")
-                    for file in self.scanned_files:
-                        file_name = os.path.basename(file)
-                        if not show_extension:
-                            file_name = os.path.splitext(file_name)[0]
-                        # 确保CSV格式正确（处理包含逗号的文件名）
-                        f.write(f'"{file_name}","{file}"\n')
-            elif file_format == "json":
-                # 保存为JSON文件
-                import json
-                # 准备JSON数据
-                # 根据显示选项准备显示文件列表
-                display_files = []
-                for file in self.scanned_files:
-                    display_files.append(self.format_file_path(file))
-                
-                json_data = {
-                    "scan_time": datetime.now().isoformat(),
-                    "scan_path": self.folder_path_var.get(),
-                    "file_count": len(self.scanned_files),
-                    "display_options": {
-                        "show_full_path": show_path,
-                        "show_extension": show_extension
-                    },
-                    "original_files": self.scanned_files,
-                    "display_files": display_files
-                }
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(json_data, f, ensure_ascii=False, indent=2)
+            write_file_list(file_path, self.scanned_files, file_format, self.folder_path_var.get(),
+                            self.show_path_var.get(), self.show_extension_var.get())
             
             self.status_var.set(f"结果已保存到 '{file_path}'")
             messagebox.showinfo("成功", f"结果已成功保存到\n{file_path}")
@@ -279,9 +282,50 @@ class FileScannerApp:
             self.status_var.set("保存过程中发生错误")
             messagebox.showerror("错误", f"保存过程中发生错误: {str(e)}")
 
-if __name__ == "__main__":
+def run_gui():
+    global tk, ttk, filedialog, messagebox
+    import tkinter as tk
+    from tkinter import filedialog, messagebox, ttk
+
     root = tk.Tk()
     # 设置中文字体
     root.option_add("*Font", "SimHei 10")
     app = FileScannerApp(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
+
+
+def build_parser(prog=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog=prog, description="扫描文件夹中的所有文件并按文件名自然数序排序。不带参数时启动图形界面。")
+    parser.add_argument("--gui", action="store_true", help="启动图形界面")
+    parser.add_argument("--folder", help="要扫描的文件夹")
+    parser.add_argument("--output", help="保存结果的文件路径，不指定时输出到控制台")
+    parser.add_argument("--format", choices=["txt", "csv", "json"], default="txt", help="保存格式")
+    parser.add_argument("--no-path", action="store_true", help="不显示完整路径，只显示文件名")
+    parser.add_argument("--no-extension", action="store_true", help="不显示文件扩展名")
+    return parser
+
+
+def main(argv=None, prog=None):
+    parser = build_parser(prog)
+    args = parser.parse_args(argv)
+    if args.gui or not args.folder:
+        run_gui()
+        return 0
+    if not os.path.isdir(args.folder):
+        parser.error(f"'{args.folder}' 不是一个有效的目录")
+
+    scanned_files = scan_folder(args.folder)
+    show_path, show_extension = not args.no_path, not args.no_extension
+    if args.output:
+        write_file_list(args.output, scanned_files, args.format, args.folder, show_path, show_extension)
+        print(f"扫描完成，共找到 {len(scanned_files)} 个文件，结果已保存到 '{args.output}'")
+    else:
+        for file_path in scanned_files:
+            print(format_file_path(file_path, show_path, show_extension))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
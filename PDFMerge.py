@@ -1,90 +1,346 @@
-import os
-import re  # 新增
-import tkinter as tk
-from tkinter import filedialog
-from PyPDF2 import PdfMerger
-
-
-# 自然排序函数
-def natural_sort_key(s):
-    return [int(text) if text.isdigit() else text.lower() for text in re.split(r'(\d+)', s)]
-
-
-def merge_pdf_files(input_path, output_file):
-    pdf_files = []
-    # 获取指定路径下的所有 .pdf 文件
-    for f in os.listdir(input_path):
-        if f.endswith('.pdf'):
-            file_path = os.path.join(input_path, f)
-            pdf_files.append((f, file_path))  # 直接以文件名作为标题
-
-    # 使用自然排序
-    pdf_files.sort(key=lambda x: natural_sort_key(x[0]))
-
-    if not pdf_files:
-        print("指定路径下没有找到 .pdf 文件。")
-        return
-
-    try:
-        with PdfMerger() as merger:
-            for title, file_path in pdf_files:
-                # 修改此处，使用 outline_item 替代 bookmark
-                merger.append(file_path, outline_item=title)
-
-            # 保存合并后的 PDF 文件
-            merger.write(output_file)
-        print(f"成功合并所有 PDF 文件到 {output_file}。")
-    except Exception as e:
-        print(f"合并 PDF 文件时出现错误: {e}")
-
-
-def select_input_path():
-    path = filedialog.askdirectory()
-    input_path_entry.delete(0, tk.END)
-    input_path_entry.insert(0, path)
-
-
-def select_output_path():
-    file_path = filedialog.asksaveasfilename(defaultextension=".pdf", filetypes=[("PDF 文件", "*.pdf")])
-    output_path_entry.delete(0, tk.END)
-    output_path_entry.insert(0, file_path)
-
-
-def start_merge():
-    input_path = input_path_entry.get()
-    output_path = output_path_entry.get()
-    if not input_path:
-        print("请选择要合并的 PDF 文件所在路径。")
-        return
-    if not output_path:
-        print("请选择合并后 PDF 文件的保存路径。")
-        return
-    merge_pdf_files(input_path, output_path)
-
-
-# 创建主窗口
-root = tk.Tk()
-root.title("合并 PDF 文件")
-
-# 输入路径选择
-input_path_label = tk.Label(root, text="选择要合并的 PDF 文件所在路径:")
-input_path_label.pack()
-input_path_entry = tk.Entry(root, width=50)
-input_path_entry.pack()
-input_path_button = tk.Button(root, text="选择路径", command=select_input_path)
-input_path_button.pack()
-
-# 输出路径选择
-output_path_label = tk.Label(root, text="选择合并后 PDF 文件的保存路径:")
-output_path_label.pack()
-output_path_entry = tk.Entry(root, width=50)
-output_path_entry.pack()
-output_path_button = tk.Button(root, text="选择路径", command=select_output_path)
-output_path_button.pack()
-
-# 开始合并按钮
-merge_button = tk.Button(root, text="开始合并", command=start_merge)
-merge_button.pack()
-
-# 运行主循环
-root.mainloop()
+import os
+import re  # 新增
+import sys
+
+# 增量追加时的清单文件后缀，清单保存在合并文件旁边
+MANIFEST_SUFFIX = ".manifest.json"
+
+
+# 自然排序函数
+def natural_sort_key(s):
+    return [int(text) if text.isdigit() else text.lower() for text in re.split(r'(\d+)', s)]
+
+
+def _report_dedup(objects, saved_bytes, seconds):
+    print(f"去重：共用 {objects} 个重复对象，少写出约 {saved_bytes / 1024 / 1024:.2f} MB，计算摘要耗时 {seconds:.2f} 秒。")
+
+
+def _merge_chunk(job):
+    """
+    在工作进程中流式合并一块文件，每个文件生成一个书签
+    :param job: (块文件路径, [(标题, 文件路径), ...], 是否去重)
+    :return: (块文件路径, 共用的对象数, 少写出的字节数, 计算摘要的耗时)
+    """
+    from PdfStreamWriter import PdfStreamWriter
+
+    chunk_file, pdf_files, dedup = job
+    # 块文件之后由主进程用 append_merged 直接复制对象，需要使用十六进制字符串
+    with PdfStreamWriter(chunk_file, hex_strings=True, dedup=dedup) as writer:
+        for title, file_path in pdf_files:
+            writer.append(file_path, title)
+    return chunk_file, writer.dedup_objects, writer.dedup_bytes, writer.dedup_seconds
+
+
+def tree_merge_pdf_files(pdf_files, output_file, workers, chunk_size=200, dedup=False):
+    """
+    分层并行合并：按顺序把文件列表分成若干块，由工作进程分别合并为临时的块文件，
+    主进程再按块的顺序把块文件（连同其中每个文件的书签）依次追加到输出文件；
+    块文件由 PdfStreamWriter 写出，追加时直接复制对象而不再解析，页面和书签的顺序与逐个合并相同
+    :param pdf_files: 已排序的 [(书签标题, 文件路径), ...]
+    :param output_file: 合并后的 PDF 文件路径
+    :param workers: 工作进程数
+    :param chunk_size: 每块的文件数
+    :param dedup: 去重，只在同一块的文件之间共用对象（主进程直接复制块文件的对象，每块保留一份）
+    """
+    import shutil
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor
+    from PdfStreamWriter import PdfStreamWriter
+
+    chunk_size = max(1, chunk_size)
+    # 块文件放在输出文件所在的目录中，结束后删除
+    temp_dir = tempfile.mkdtemp(prefix=".merge-", dir=os.path.dirname(os.path.abspath(output_file)))
+    try:
+        jobs = [(os.path.join(temp_dir, f"{i:05d}.pdf"), pdf_files[start:start + chunk_size], dedup)
+                for i, start in enumerate(range(0, len(pdf_files), chunk_size))]
+        totals = [0, 0, 0.0]
+        with ProcessPoolExecutor(max_workers=workers) as executor, PdfStreamWriter(output_file) as writer:
+            # map 按提交顺序返回结果：前面的块合并完成后立即写入输出文件，其余的块仍在并行合并
+            for chunk_file, *stats in executor.map(_merge_chunk, jobs):
+                writer.append_merged(chunk_file)
+                os.remove(chunk_file)
+                totals = [total + value for total, value in zip(totals, stats)]
+        if dedup:
+            _report_dedup(*totals)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def _load_merge_manifest(output_file):
+    """
+    读取合并文件的清单，清单不存在、无法读取或合并文件在上次合并后被改动过时返回 None
+    :return: 上次合并的 [{"name": 文件名, "size": 字节数, "sha256": 摘要}, ...]
+    """
+    import json
+
+    manifest_path = output_file + MANIFEST_SUFFIX
+    if not os.path.exists(output_file) or not os.path.exists(manifest_path):
+        print("没有找到上次合并的文件或清单，将重新合并所有文件。")
+        return None
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        stat = os.stat(output_file)
+        if (manifest["output_size"], manifest["output_mtime_ns"]) != (stat.st_size, stat.st_mtime_ns):
+            print(f"{output_file} 在上次合并后被改动过，将重新合并所有文件。")
+            return None
+        return manifest["files"]
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"读取清单 {manifest_path} 时出错，将重新合并所有文件: {e}")
+        return None
+
+
+def _save_merge_manifest(output_file, entries):
+    import json
+
+    manifest_path = output_file + MANIFEST_SUFFIX
+    stat = os.stat(output_file)
+    manifest = {"output_size": stat.st_size, "output_mtime_ns": stat.st_mtime_ns, "files": entries}
+    temp_path = manifest_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(temp_path, manifest_path)
+
+
+def append_pdf_files(pdf_files, output_file, workers=1, chunk_size=200, dedup=False):
+    """
+    增量追加：根据合并文件旁边的清单（每个已合并文件的文件名、大小和 SHA-256）判断哪些文件已经合并过，
+    已合并的文件仍是当前排序结果的开头部分且内容未变时，只把其余的文件（连同书签）以增量更新的方式追加到合并文件末尾，
+    已有的内容不改写；否则（插入到中间、改动或删除了已合并的文件，清单缺失等）重新合并所有文件
+    :param pdf_files: 已排序的 [(书签标题, 文件路径), ...]
+    :param output_file: 合并后的 PDF 文件路径
+    :param workers: 重新合并时的工作进程数
+    :param chunk_size: 重新合并时每块的文件数
+    :param dedup: 去重（增量追加时只在新增的文件之间共用对象）
+    :return: 追加（或重新合并）的文件数
+    """
+    from PdfStreamWriter import PdfIncrementalWriter, PdfStreamWriter
+    from RenderManifest import file_digest
+
+    previous = _load_merge_manifest(output_file)
+    entries = []
+    if previous is not None:
+        for (title, file_path), entry in zip(pdf_files, previous):
+            # 先比较文件名和大小，不一致时不必计算摘要
+            if (title != entry.get("name") or os.path.getsize(file_path) != entry.get("size")
+                    or file_digest(file_path) != entry.get("sha256")):
+                print(f"已合并的文件 {entry.get('name')} 被改动、删除或之前插入了新文件，将重新合并所有文件。")
+                previous = None
+                break
+            entries.append(entry)
+        else:
+            if len(previous) > len(pdf_files):
+                print("部分已合并的文件已被删除，将重新合并所有文件。")
+                previous = None
+    if previous is None:
+        entries = []
+    new_files = pdf_files[len(entries):]
+    if not new_files:
+        print(f"没有需要追加的 PDF 文件，{output_file} 已是最新。")
+        return 0
+    entries.extend({"name": title, "size": os.path.getsize(file_path), "sha256": file_digest(file_path)}
+                   for title, file_path in new_files)
+
+    if previous is not None:
+        with PdfIncrementalWriter(output_file, dedup=dedup) as writer:
+            for title, file_path in new_files:
+                writer.append(file_path, title)
+        print(f"已追加 {len(new_files)} 个 PDF 文件到 {output_file}。")
+    elif workers > 1:
+        tree_merge_pdf_files(pdf_files, output_file, workers, chunk_size, dedup)
+        writer = None
+    else:
+        with PdfStreamWriter(output_file, dedup=dedup) as writer:
+            for title, file_path in pdf_files:
+                writer.append(file_path, title)
+    if dedup and writer is not None:
+        _report_dedup(writer.dedup_objects, writer.dedup_bytes, writer.dedup_seconds)
+    _save_merge_manifest(output_file, entries)
+    return len(new_files)
+
+
+def merge_pdf_files(input_path, output_file, streaming=False, workers=1, chunk_size=200, append=False,
+                    dedup=False):
+    """
+    按文件名自然排序合并文件夹中的 PDF 文件，每个文件生成一个书签
+    :param input_path: PDF 文件所在路径
+    :param output_file: 合并后的 PDF 文件路径
+    :param streaming: 流式合并，逐个文件写出并释放，内存占用与文件数量基本无关（见 PdfStreamWriter.py）
+    :param workers: 工作进程数，大于 1 时分层并行合并（总是使用流式合并），0 表示使用全部 CPU 核心
+    :param chunk_size: 分层并行合并时每块的文件数
+    :param append: 增量追加，只把上次合并之后新增的文件追加到已有的合并文件中（总是使用流式合并，见 append_pdf_files）
+    :param dedup: 去重，内容相同的字体、图片、表单等对象只写出一次（总是使用流式合并），结束时输出少写出的字节数和耗时
+    :return: 是否合并成功（没有找到 PDF 文件或合并出错时为 False，错误信息已输出）
+    """
+    pdf_files = []
+    # 获取指定路径下的所有 .pdf 文件
+    for f in os.listdir(input_path):
+        if f.endswith('.pdf'):
+            file_path = os.path.join(input_path, f)
+            pdf_files.append((f, file_path))  # 直接以文件名作为标题
+
+    # 使用自然排序
+    pdf_files.sort(key=lambda x: natural_sort_key(x[0]))
+
+    if not pdf_files:
+        print("指定路径下没有找到 .pdf 文件。")
+        return False
+
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    try:
+        if append:
+            if append_pdf_files(pdf_files, output_file, workers, chunk_size, dedup):
+                print(f"成功合并所有 PDF 文件到 {output_file}。")
+            return True
+
+        if workers > 1:
+            tree_merge_pdf_files(pdf_files, output_file, workers, chunk_size, dedup)
+            print(f"成功合并所有 PDF 文件到 {output_file}。")
+            return True
+
+        if streaming or dedup:
+            from PdfStreamWriter import PdfStreamWriter
+
+            with PdfStreamWriter(output_file, dedup=dedup) as writer:
+                for title, file_path in pdf_files:
+                    writer.append(file_path, title)
+            if dedup:
+                _report_dedup(writer.dedup_objects, writer.dedup_bytes, writer.dedup_seconds)
+            print(f"成功合并所有 PDF 文件到 {output_file}。")
+            return True
+
+        from PyPDF2 import PdfMerger
+
+        with PdfMerger() as merger:
+            for title, file_path in pdf_files:
+                # 修改此处，使用 outline_item 替代 bookmark
+                merger.append(file_path, outline_item=title)
+
+            # 保存合并后的 PDF 文件
+            merger.write(output_file)
+        print(f"成功合并所有 PDF 文件到 {output_file}。")
+        return True
+    except Exception as e:
+        print(f"合并 PDF 文件时出现错误: {e}")
+        return False
+
+
+def run_gui():
+    import tkinter as tk
+    from tkinter import filedialog
+
+    def select_input_path():
+        path = filedialog.askdirectory()
+        input_path_entry.delete(0, tk.END)
+        input_path_entry.insert(0, path)
+
+    def select_output_path():
+        file_path = filedialog.asksaveasfilename(defaultextension=".pdf", filetypes=[("PDF 文件", "*.pdf")])
+        output_path_entry.delete(0, tk.END)
+        output_path_entry.insert(0, file_path)
+
+    def start_merge():
+        input_path = input_path_entry.get()
+        output_path = output_path_entry.get()
+        if not input_path:
+            print("请选择要合并的 PDF 文件所在路径。")
+            return
+        if not output_path:
+            print("请选择合并后 PDF 文件的保存路径。")
+            return
+        try:
+            workers = int(workers_entry.get() or 1)
+        except ValueError:
+            print("并行进程数必须是整数。")
+            return
+        merge_pdf_files(input_path, output_path, streaming=streaming_var.get(), workers=workers,
+                        append=append_var.get(), dedup=dedup_var.get())
+
+    # 创建主窗口
+    root = tk.Tk()
+    root.title("合并 PDF 文件")
+
+    # 输入路径选择
+    input_path_label = tk.Label(root, text="选择要合并的 PDF 文件所在路径:")
+    input_path_label.pack()
+    input_path_entry = tk.Entry(root, width=50)
+    input_path_entry.pack()
+    input_path_button = tk.Button(root, text="选择路径", command=select_input_path)
+    input_path_button.pack()
+
+    # 输出路径选择
+    output_path_label = tk.Label(root, text="选择合并后 PDF 文件的保存路径:")
+    output_path_label.pack()
+    output_path_entry = tk.Entry(root, width=50)
+    output_path_entry.pack()
+    output_path_button = tk.Button(root, text="选择路径", command=select_output_path)
+    output_path_button.pack()
+
+    # 流式合并选项
+    streaming_var = tk.BooleanVar(value=False)
+    streaming_check = tk.Checkbutton(root, text="流式合并（文件很多时内存占用固定）", variable=streaming_var)
+    streaming_check.pack()
+
+    # 去重选项
+    dedup_var = tk.BooleanVar(value=False)
+    dedup_check = tk.Checkbutton(root, text="去重（共用相同的字体、图片等对象，文件更小）", variable=dedup_var)
+    dedup_check.pack()
+
+    # 增量追加选项
+    append_var = tk.BooleanVar(value=False)
+    append_check = tk.Checkbutton(root, text="增量追加（只追加上次合并后新增的文件）", variable=append_var)
+    append_check.pack()
+
+    # 并行进程数
+    workers_label = tk.Label(root, text="并行进程数（1 为逐个合并，0 为全部核心）:")
+    workers_label.pack()
+    workers_entry = tk.Entry(root, width=10)
+    workers_entry.insert(0, "1")
+    workers_entry.pack()
+
+    # 开始合并按钮
+    merge_button = tk.Button(root, text="开始合并", command=start_merge)
+    merge_button.pack()
+
+    # 运行主循环
+    root.mainloop()
+
+
+def build_parser(prog=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog=prog, description="按文件名自然排序合并文件夹中的 PDF 文件，每个文件生成一个书签。不带参数时启动图形界面。")
+    parser.add_argument("--gui", action="store_true", help="启动图形界面")
+    parser.add_argument("--input", help="要合并的 PDF 文件所在路径")
+    parser.add_argument("--output", help="合并后 PDF 文件的保存路径")
+    parser.add_argument("--streaming", action="store_true",
+                        help="流式合并：逐个文件写出并释放，合并大量文件时内存占用固定")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="工作进程数，大于 1 时分块并行合并后再按顺序合并各块（总是流式合并），0 表示全部 CPU 核心")
+    parser.add_argument("--append", action="store_true",
+                        help="增量追加：根据合并文件旁边的清单只追加新增的文件，已合并的文件有变化时重新合并")
+    parser.add_argument("--dedup", action="store_true",
+                        help="去重：内容相同的字体、图片、表单等对象只写出一次（流式合并），结束时输出少写出的字节数和耗时")
+    parser.add_argument("--chunk-size", type=int, default=200, help="分块并行合并时每块的文件数")
+    return parser
+
+
+def main(argv=None, prog=None):
+    parser = build_parser(prog)
+    args = parser.parse_args(argv)
+    if args.gui or not (args.input or args.output):
+        run_gui()
+        return 0
+    if not args.input or not args.output:
+        parser.error("无界面模式需要同时指定 --input 和 --output")
+    # 合并失败时返回非零的退出码，便于构建服务器判断
+    if not merge_pdf_files(args.input, args.output, streaming=args.streaming, workers=args.workers,
+                           chunk_size=args.chunk_size, append=args.append,
+                           dedup=args.dedup):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
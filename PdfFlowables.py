@@ -0,0 +1,201 @@
+from reportlab.platypus import Flowable
+
+# 表单边界比内容多留出的宽度，避免裁掉表格边框线条的外侧一半
+_FORM_BLEED = 2
+
+
+class StaticLayout:
+    """
+    静态内容块的排版结果：内容从上到下依次排列，只排版一次，可在多个文档中共用
+    """
+
+    def __init__(self, flowables, width):
+        """
+        :param flowables: 从上到下排列的内容，排版后不能再修改
+        :param width: 可用宽度
+        """
+        self.width = width
+        # [(flowable, 底边 y 坐标, 水平方向的剩余宽度)]，y 坐标以内容块底边为 0
+        self.placed = []
+        y = 0
+        previous_space_after = 0
+        for index, flowable in enumerate(flowables):
+            w, h = flowable.wrap(width, 1e6)
+            if index:
+                # 与 Frame 相同：相邻内容之间取前者的段后间距和后者的段前间距中较大的一个
+                y -= max(previous_space_after, flowable.getSpaceBefore())
+            y -= h
+            self.placed.append((flowable, y, width - w))
+            previous_space_after = flowable.getSpaceAfter()
+        self.height = -y
+        self.placed = [(flowable, bottom + self.height, spare) for flowable, bottom, spare in self.placed]
+
+
+class StaticBlock(Flowable):
+    """
+    固定尺寸的静态内容块：内容只排版一次（见 StaticLayout），与 KeepTogether 一样不会跨页拆分；
+    使用表单时，每个 PDF 中第一次出现时绘制为表单（Form XObject），此后的页面只引用该表单
+    """
+
+    def __init__(self, form_name, layout, as_form=True):
+        """
+        :param form_name: 表单名称，同一个 PDF 中名称相同的内容块共用一个表单
+        :param layout: StaticLayout 对象
+        :param as_form: 是否绘制为表单；每个 PDF 中只出现一次时直接绘制更小
+        """
+        super().__init__()
+        self.form_name = form_name
+        self.layout = layout
+        self.as_form = as_form
+
+    def wrap(self, availWidth, availHeight):
+        return self.layout.width, self.layout.height
+
+    def _draw_content(self, canv):
+        for flowable, y, spare in self.layout.placed:
+            flowable.drawOn(canv, 0, y, _sW=spare)
+
+    def draw(self):
+        canv = self.canv
+        if not self.as_form:
+            self._draw_content(canv)
+            return
+        if not canv.hasForm(self.form_name):
+            layout = self.layout
+            canv.beginForm(self.form_name, -_FORM_BLEED, -_FORM_BLEED,
+                           layout.width + _FORM_BLEED, layout.height + _FORM_BLEED)
+            self._draw_content(canv)
+            canv.endForm()
+        canv.doForm(self.form_name)
+
+
+class _MeasuredRows:
+    """
+    长表格中按需生成并测量的数据行：每次生成 batch 行，连同表头放在一个 Table 中排版一次得到各行的行高，
+    此后分页和绘制都直接使用这些行高，不再重新排版；只保留尚未放入页面的行
+    """
+
+    def __init__(self, header_rows, row_count, make_row, col_widths, style, batch):
+        self.header_rows = header_rows
+        self.row_count = row_count
+        self.make_row = make_row
+        self.col_widths = col_widths
+        self.style = style
+        self.batch = batch
+        # rows[0] 的行号
+        self.first = 0
+        self.rows = []
+        self.heights = []
+        self.header_heights = None
+
+    def table(self, data, row_heights=None):
+        from reportlab.platypus import Table
+
+        table = Table(data, colWidths=self.col_widths, rowHeights=row_heights,
+                      repeatRows=len(self.header_rows))
+        table.setStyle(self.style)
+        return table
+
+    def measure(self, end, availWidth):
+        """
+        生成并测量到第 end 行（不含）为止的数据行
+        """
+        end = min(end, self.row_count)
+        while self.first + len(self.rows) < end:
+            start = self.first + len(self.rows)
+            rows = [self.make_row(i) for i in range(start, min(start + self.batch, self.row_count))]
+            table = self.table(list(self.header_rows) + rows)
+            # 可用高度不限，所有行都计算行高（longTableOptimize 超出可用高度即停止）
+            table.wrap(availWidth, float("inf"))
+            header_count = len(self.header_rows)
+            if self.header_heights is None:
+                self.header_heights = table._rowHeights[:header_count]
+            self.rows.extend(rows)
+            self.heights.extend(table._rowHeights[header_count:])
+
+    def drop(self, end):
+        """
+        丢弃第 end 行之前的数据行（已放入页面）
+        """
+        del self.rows[:end - self.first]
+        del self.heights[:end - self.first]
+        self.first = end
+
+
+class ChunkedTable(Flowable):
+    """
+    长表格：表格行按需逐批生成并测量行高（见 _MeasuredRows），每页只用放得下的行（加上重复的表头）组成一个 Table，
+    拆分和绘制时直接使用已测量的行高，每个单元格只在测量和绘制时各排版一次，
+    不像整张 Table 那样拆分时还要再排版剩余的行；每行的耗时和内存与总行数无关。表格不能跨行拆分单元格（与 Table 的默认设置相同）
+    """
+
+    def __init__(self, header_rows, row_count, make_row, col_widths, style, batch=64):
+        """
+        :param header_rows: 每页重复的表头行
+        :param row_count: 数据行总数
+        :param make_row: make_row(index) 返回第 index 个数据行的单元格列表
+        :param col_widths: 列宽
+        :param style: TableStyle 对象
+        :param batch: 每次生成并测量的行数
+        """
+        super().__init__()
+        self._rows = _MeasuredRows(header_rows, row_count, make_row, col_widths, style, batch)
+        # 从第几个数据行开始（拆分后的剩余部分使用）
+        self._start = 0
+        # 与 Table 相同，居中放置
+        self.hAlign = 'CENTER'
+        # 剩余的行全部放得下时 wrap 生成的 Table
+        self._table = None
+
+    def _fit(self, availWidth, availHeight):
+        """
+        :return: (放得下的数据行数, 这些行连同表头的高度, 下一行的高度（剩余的行全部放得下时为 None）)
+        """
+        rows = self._rows
+        index = self._start
+        # 之前的行已放入上一页
+        if index > rows.first:
+            rows.drop(index)
+        if rows.header_heights is None:
+            rows.measure(index + 1, availWidth)
+        used = sum(rows.header_heights)
+        while index < rows.row_count:
+            if index >= rows.first + len(rows.heights):
+                rows.measure(index + 1, availWidth)
+            height = rows.heights[index - rows.first]
+            if used + height > availHeight:
+                return index - self._start, used, height
+            used += height
+            index += 1
+        return index - self._start, used, None
+
+    def _page_table(self, count):
+        rows = self._rows
+        start = self._start - rows.first
+        return rows.table(list(rows.header_rows) + rows.rows[start:start + count],
+                          list(rows.header_heights) + rows.heights[start:start + count])
+
+    def wrap(self, availWidth, availHeight):
+        count, used, next_height = self._fit(availWidth, availHeight)
+        if next_height is not None:
+            # 放不下，返回超出可用高度的高度，由 split 拆分
+            self._table = None
+            return sum(self._rows.col_widths), used + next_height
+        self._table = self._page_table(count)
+        return self._table.wrap(availWidth, availHeight)
+
+    def split(self, availWidth, availHeight):
+        count, _, next_height = self._fit(availWidth, availHeight)
+        if count == 0:
+            return []
+        if next_height is None:
+            return [self]
+        rows = self._rows
+        rest = ChunkedTable(rows.header_rows, rows.row_count, rows.make_row, rows.col_widths, rows.style, rows.batch)
+        # 剩余部分与原表格共用已测量的行
+        rest._rows = rows
+        rest._start = self._start + count
+        return [self._page_table(count), rest]
+
+    def draw(self):
+        self._table.drawOn(self.canv, 0, 0)
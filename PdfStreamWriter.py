@@ -0,0 +1,648 @@
+import codecs
+import hashlib
+import os
+import re
+import time
+from array import array
+from collections import deque
+from io import BytesIO
+
+# 输出文件头，第二行的非 ASCII 字节表示文件包含二进制数据
+_HEADER = b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n"
+# 预留的对象号：文档目录、页面树根节点、书签根节点，在 close 时写出
+_CATALOG, _PAGES, _OUTLINES = 1, 2, 3
+# 对象引用；hex_strings 模式写出的文件中字符串都是十六进制字符串，字典中出现的 "n 0 R" 只能是引用
+_REFERENCE = re.compile(rb"(\d+) 0 R")
+# 流数据之前的关键字，之前是字典部分，之后的流数据原样复制
+_STREAM_KEYWORD = b"\nstream\n"
+# 本模块写出的书签对象中的字段
+_OUTLINE_FIRST = re.compile(rb"/First (\d+) 0 R")
+_OUTLINE_NEXT = re.compile(rb"/Next (\d+) 0 R")
+_OUTLINE_DEST = re.compile(rb"/Dest (\[[^\]]*\])")
+_OUTLINE_TITLE = re.compile(rb"/Title <([0-9a-fA-F]*)>")
+
+
+class _Unshareable(Exception):
+    """
+    对象直接或间接引用了页面或处于循环引用中，不参与去重
+    """
+
+
+class PdfStreamWriter:
+    """
+    流式合并 PDF：每追加一个输入文件，就把它的页面及页面引用到的对象重新编号后立即写入输出文件，
+    随后释放该输入文件；内存中只保留每个对象的偏移量、页面对象号和书签，与输入文件的数量和大小基本无关。
+    输出先写入临时文件，close 时写出页面树、书签、交叉引用表后替换为目标文件
+    """
+
+    def __init__(self, output_file, hex_strings=False, dedup=False):
+        """
+        :param output_file: 合并后的 PDF 文件路径
+        :param hex_strings: 所有字符串写为十六进制字符串，作为中间结果、之后用 append_merged 追加的文件需要指定
+        :param dedup: 去重，内容相同的对象（字体、图片、表单、内容流等，连同其引用的对象）只写出一次，由各文件共用
+        """
+        self._setup(output_file, hex_strings, dedup)
+        self._temp_path = output_file + ".tmp"
+        self._file = open(self._temp_path, "wb")
+        self._file.write(_HEADER)
+        # 每个新对象在输出文件中的偏移量，下标为对象号 - _first_number；预留的对象在 close 时写出
+        self._first_number = 1
+        self._offsets = [None, None, None]
+
+    def _setup(self, output_file, hex_strings, dedup):
+        from PyPDF2 import generic
+
+        self._generic = generic
+        # {PyPDF2 对象类型: 写出方式}，PyPDF2 的对象类型基于 typing.Protocol，isinstance 判断较慢，每种类型只判断一次
+        self._kinds = {}
+        self.output_file = output_file
+        self.hex_strings = hex_strings
+        # 本次追加的页面的对象号，按输出顺序排列
+        self._kids = array("l")
+        # 本次追加的顶层书签 [(标题, 目标（已序列化的字节）, 子书签)]
+        self._outline = []
+        self.dedup = dedup
+        # 已写出的可共用对象 {内容摘要: 对象号}
+        self._shared = {}
+        # 去重统计：共用的对象数、少写出的字节数（按对象序列化后的长度估算）、计算摘要的耗时（秒）
+        self.dedup_objects = 0
+        self.dedup_bytes = 0
+        self.dedup_seconds = 0.0
+
+    @property
+    def page_count(self):
+        return len(self._kids)
+
+    def append(self, path, title=None, import_outline=True):
+        """
+        追加一个 PDF 文件的全部页面
+        :param path: 输入 PDF 文件路径
+        :param title: 书签标题，指定时为该文件添加一个指向其第一页的书签，文件自带的书签作为它的子书签
+        :param import_outline: 是否保留输入文件自带的书签
+        :return: 追加的页数
+        """
+        from PyPDF2 import PdfReader
+
+        # PdfReader 会把整个文件读入内存后立即关闭文件，处理完该文件后即可释放
+        reader = PdfReader(path)
+        if reader.is_encrypted:
+            raise ValueError(f"不支持加密的 PDF: {path}")
+        # 输入文件中的 (对象号, 代号) -> 输出文件中的对象号
+        numbers = {}
+        # 已编号、尚未写出的对象 [(输入文件中的引用, 输出文件中的对象号)]
+        pending = deque()
+        # 去重时每个对象的 (内容摘要, 序列化后的长度, 引用的对象)，不能共用的对象摘要为 None
+        digests = {}
+        for page in reader.pages:
+            digests[(page.indirect_reference.idnum, page.indirect_reference.generation)] = (None, 0, ())
+
+        def ref(indirect):
+            key = (indirect.idnum, indirect.generation)
+            number = numbers.get(key)
+            if number is None:
+                digest = None
+                if self.dedup:
+                    start = time.perf_counter()
+                    digest = self._digest(indirect, digests)
+                    self.dedup_seconds += time.perf_counter() - start
+                    number = self._shared.get(digest) if digest is not None else None
+                    if number is not None:
+                        self._reuse(key, digests, numbers)
+                        return number
+                number = numbers[key] = self._new_number()
+                if digest is not None:
+                    self._shared[digest] = number
+                pending.append((indirect, number))
+            return number
+
+        # 先为所有页面编号，其他对象（如链接注释、书签）引用页面时使用新的对象号
+        pages = {}
+        for page in reader.pages:
+            pages[ref(page.indirect_reference)] = page
+        page_numbers = list(pages)
+        outline = self._read_outline(reader, numbers) if import_outline else []
+
+        while pending:
+            indirect, number = pending.popleft()
+            page = pages.get(number)
+            if page is not None:
+                # 页面的父节点改为输出文件的页面树根节点，不复制输入文件的页面树
+                self._write_object(number, page, ref, skip=("/Parent",), extra=b"/Parent %d 0 R" % _PAGES)
+            else:
+                self._write_object(number, indirect.get_object(), ref)
+
+        self._kids.extend(page_numbers)
+        if title is not None:
+            first_page = b"[%d 0 R /Fit]" % page_numbers[0] if page_numbers else None
+            self._outline.append((title, first_page, outline))
+        else:
+            self._outline.extend(outline)
+        return len(page_numbers)
+
+    def _digest(self, indirect, digests):
+        """
+        计算对象的内容摘要：对象序列化后的字节（引用替换为序号）加上所引用对象的摘要，
+        内容相同且引用的对象也相同的对象摘要相同
+        :param digests: 本文件中已计算的 {(对象号, 代号): (摘要, 长度, 引用的对象)}
+        :return: 摘要，不能共用时返回 None
+        """
+        key = (indirect.idnum, indirect.generation)
+        known = digests.get(key)
+        if known is not None:
+            return known[0]
+        # 先标记为不能共用，循环引用回到此对象时即不能共用
+        digests[key] = (None, 0, ())
+        children = []
+        child_digests = []
+
+        def child(reference):
+            digest = self._digest(reference, digests)
+            if digest is None:
+                raise _Unshareable
+            children.append((reference.idnum, reference.generation))
+            child_digests.append(digest)
+            return len(children)
+
+        buffer = BytesIO()
+        try:
+            self._write_value(indirect.get_object(), child, out=buffer)
+        except _Unshareable:
+            return None
+        data = buffer.getvalue()
+        digest = hashlib.sha256(data)
+        for child_digest in child_digests:
+            digest.update(child_digest)
+        digest = digest.digest()
+        digests[key] = (digest, len(data), children)
+        return digest
+
+    def _reuse(self, key, digests, numbers):
+        """
+        共用已写出的对象：该对象及其引用的对象都使用已写出的对象号，不再写出
+        """
+        stack = [key]
+        while stack:
+            key = stack.pop()
+            if key in numbers:
+                continue
+            digest, size, children = digests[key]
+            numbers[key] = self._shared[digest]
+            self.dedup_objects += 1
+            self.dedup_bytes += size
+            stack.extend(children)
+
+    def _new_number(self):
+        self._offsets.append(None)
+        return self._first_number + len(self._offsets) - 1
+
+    def _mark(self, number):
+        """
+        记录对象的偏移量（对象即将从当前位置开始写出）
+        """
+        self._offsets[number - self._first_number] = self._file.tell()
+
+    def _write_object(self, number, obj, ref, skip=(), extra=b""):
+        """
+        写出一个对象，对象中的间接引用通过 ref 替换为输出文件中的对象号
+        """
+        self._mark(number)
+        self._file.write(b"%d 0 obj\n" % number)
+        self._write_value(obj, ref, skip, extra)
+        self._file.write(b"\nendobj\n")
+
+    def _kind(self, cls):
+        generic = self._generic
+        if issubclass(cls, generic.IndirectObject):
+            kind = "reference"
+        elif issubclass(cls, generic.StreamObject):
+            kind = "stream"
+        elif issubclass(cls, generic.DictionaryObject):
+            kind = "dictionary"
+        elif issubclass(cls, generic.ArrayObject):
+            kind = "array"
+        elif issubclass(cls, (generic.TextStringObject, generic.ByteStringObject)):
+            kind = "string"
+        else:
+            kind = "other"
+        self._kinds[cls] = kind
+        return kind
+
+    def _write_value(self, value, ref, skip=(), extra=b"", out=None):
+        out = out or self._file
+        write = out.write
+        kind = self._kinds.get(type(value)) or self._kind(type(value))
+        if kind == "reference":
+            write(b"%d 0 R" % ref(value))
+        elif kind == "dictionary" or kind == "stream":
+            if kind == "stream":
+                # 流的长度可能是间接对象，按实际数据重新写出
+                data = value._data
+                skip = skip + ("/Length",)
+                extra = extra + b"/Length %d" % len(data)
+            write(b"<<")
+            for key, item in value.items():
+                if key in skip:
+                    continue
+                key.write_to_stream(out, None)
+                write(b" ")
+                self._write_value(item, ref, out=out)
+                write(b"\n")
+            write(extra)
+            write(b">>")
+            if kind == "stream":
+                write(_STREAM_KEYWORD)
+                write(data)
+                write(b"\nendstream")
+        elif kind == "array":
+            write(b"[")
+            for index, item in enumerate(value):
+                if index:
+                    write(b" ")
+                self._write_value(item, ref, out=out)
+            write(b"]")
+        elif kind == "string" and self.hex_strings:
+            if isinstance(value, str):
+                try:
+                    data = value.get_original_bytes()
+                except Exception:
+                    # 新建的文本字符串没有原始编码
+                    data = codecs.BOM_UTF16_BE + value.encode("utf-16-be")
+            else:
+                data = bytes(value)
+            write(b"<%s>" % data.hex().encode())
+        else:
+            value.write_to_stream(out, None)
+
+    def _string_token(self, text):
+        """
+        :return: 文本字符串序列化后的字节
+        """
+        if self.hex_strings:
+            return b"<%s>" % (codecs.BOM_UTF16_BE + text.encode("utf-16-be")).hex().encode()
+        buffer = BytesIO()
+        self._generic.create_string_object(text).write_to_stream(buffer, None)
+        return buffer.getvalue()
+
+    def append_merged(self, path):
+        """
+        追加由本模块以 hex_strings=True 写出的合并文件：不再用 PyPDF2 解析，直接复制其中的对象，
+        只把字典部分的引用替换为新的对象号；页面顺序和书签（包含子书签）保持不变
+        :param path: 合并文件路径
+        :return: 追加的页数
+        """
+        with open(path, "rb") as f:
+            data = f.read()
+        # 交叉引用表："xref\n0 对象数\n" 之后每个对象一行，每行 20 字节，第 0 行为空闲项
+        xref_offset = int(data[data.rindex(b"startxref") + len(b"startxref"):].split()[0])
+        size = int(data[xref_offset:xref_offset + 64].split()[2])
+        table = xref_offset + len(b"xref\n0 %d\n" % size)
+        offsets = [int(data[table + 20 * i:table + 20 * i + 10]) for i in range(size)]
+        # 对象依次写出，每个对象到下一个对象（或交叉引用表）之前结束
+        ends = {}
+        ordered = sorted(range(1, size), key=offsets.__getitem__)
+        for number, following in zip(ordered, ordered[1:] + [None]):
+            ends[number] = offsets[following] if following is not None else xref_offset
+
+        def body(number):
+            raw = data[offsets[number]:ends[number]]
+            return raw[raw.index(b"\n") + 1:raw.rindex(b"\nendobj")]
+
+        # 书签对象不复制，读取后与其他文件的书签一起在 close 时写出
+        outline_numbers = set()
+        outline = self._read_merged_outline(body, _OUTLINE_FIRST.search(body(_OUTLINES)), outline_numbers)
+        kids = [int(number) for number in _REFERENCE.findall(body(_PAGES))]
+
+        # 页面及其引用的对象按原顺序重新编号，页面的父节点对应输出文件的页面树根节点
+        mapping = [0] * size
+        mapping[_PAGES] = _PAGES
+        numbers = [number for number in range(_OUTLINES + 1, size) if number not in outline_numbers]
+        for number in numbers:
+            mapping[number] = self._new_number()
+
+        def renumber(match):
+            return b"%d 0 R" % mapping[int(match.group(1))]
+
+        write = self._file.write
+        for number in numbers:
+            raw = body(number)
+            stream_start = raw.find(_STREAM_KEYWORD)
+            head = raw if stream_start < 0 else raw[:stream_start]
+            new_number = mapping[number]
+            self._mark(new_number)
+            write(b"%d 0 obj\n" % new_number)
+            write(_REFERENCE.sub(renumber, head))
+            if stream_start >= 0:
+                write(raw[stream_start:])
+            write(b"\nendobj\n")
+
+        self._kids.extend(mapping[number] for number in kids)
+        self._outline.extend(self._renumber_outline(outline, renumber))
+        return len(kids)
+
+    def _read_merged_outline(self, body, first, outline_numbers):
+        """
+        读取本模块写出的书签（字段格式固定），目标仍使用合并文件中的对象号
+        :return: [(标题, 目标, 子书签)]
+        """
+        nodes = []
+        match = first
+        while match is not None:
+            number = int(match.group(1))
+            if number in outline_numbers:
+                break
+            outline_numbers.add(number)
+            raw = body(number)
+            title = _OUTLINE_TITLE.search(raw)
+            title = str(self._generic.create_string_object(bytes.fromhex(title.group(1).decode()))) if title else ""
+            dest = _OUTLINE_DEST.search(raw)
+            children = self._read_merged_outline(body, _OUTLINE_FIRST.search(raw), outline_numbers)
+            nodes.append((title, dest.group(1) if dest else None, children))
+            match = _OUTLINE_NEXT.search(raw)
+        return nodes
+
+    def _renumber_outline(self, nodes, renumber):
+        return [(title, _REFERENCE.sub(renumber, dest) if dest is not None else None,
+                 self._renumber_outline(children, renumber))
+                for title, dest, children in nodes]
+
+    def _read_outline(self, reader, numbers):
+        """
+        读取输入文件的书签，目标页面替换为输出文件中的对象号
+        :return: [(标题, 目标, 子书签)]
+        """
+        outlines = reader.trailer["/Root"].get("/Outlines")
+        if outlines is None:
+            return []
+        return self._read_outline_items(reader, outlines.get_object().get("/First"), numbers, set())
+
+    def _read_outline_items(self, reader, item, numbers, seen):
+        nodes = []
+        while item is not None and item.idnum not in seen:
+            seen.add(item.idnum)
+            obj = item.get_object()
+            dest = obj.get("/Dest")
+            if dest is None and "/A" in obj:
+                action = obj["/A"].get_object()
+                if action.get("/S") == "/GoTo":
+                    dest = action.get("/D")
+            children = self._read_outline_items(reader, obj.get("/First"), numbers, seen)
+            nodes.append((str(obj.get("/Title", "")), self._convert_dest(reader, dest, numbers), children))
+            item = obj.get("/Next")
+        return nodes
+
+    def _convert_dest(self, reader, dest, numbers):
+        """
+        把书签目标转换为输出文件中的目标数组（序列化后的字节），目标页面不在该文件中时返回 None
+        """
+        IndirectObject = self._generic.IndirectObject
+        if dest is None:
+            return None
+        dest = dest.get_object()
+        if isinstance(dest, str):
+            # 命名目标
+            named = reader.named_destinations.get(str(dest))
+            if named is None:
+                return None
+            dest = named.dest_array
+        elif isinstance(dest, dict):
+            dest = dest.get("/D")
+        if not dest or not isinstance(dest[0], IndirectObject):
+            return None
+        number = numbers.get((dest[0].idnum, dest[0].generation))
+        if number is None:
+            return None
+        buffer = BytesIO()
+        buffer.write(b"[%d 0 R" % number)
+        for item in dest[1:]:
+            buffer.write(b" ")
+            item.get_object().write_to_stream(buffer, None)
+        buffer.write(b"]")
+        return buffer.getvalue()
+
+    def _write_outline_level(self, nodes, parent, prev=None):
+        """
+        写出同一级的书签（所有书签都是展开的）
+        :param prev: 第一个书签之前已有的同级书签的对象号
+        :return: (第一个书签的对象号, 最后一个书签的对象号, 书签总数（包含子书签）)
+        """
+        numbers = [self._new_number() for _ in nodes]
+        total = len(nodes)
+        for index, (title, dest, children) in enumerate(nodes):
+            number = numbers[index]
+            entries = [b"/Parent %d 0 R" % parent]
+            if index or prev is not None:
+                entries.append(b"/Prev %d 0 R" % (numbers[index - 1] if index else prev))
+            if index + 1 < len(numbers):
+                entries.append(b"/Next %d 0 R" % numbers[index + 1])
+            if children:
+                first, last, count = self._write_outline_level(children, number)
+                entries.append(b"/First %d 0 R /Last %d 0 R /Count %d" % (first, last, count))
+                total += count
+            if dest is not None:
+                entries.append(b"/Dest " + dest)
+            entries.append(b"/Title " + self._string_token(title))
+            self._write_raw(number, b"<<" + b"\n".join(entries) + b">>")
+        return numbers[0], numbers[-1], total
+
+    def _write_raw(self, number, body):
+        self._mark(number)
+        self._file.write(b"%d 0 obj\n" % number)
+        self._file.write(body)
+        self._file.write(b"\nendobj\n")
+
+    def close(self):
+        """
+        写出页面树、书签、文档目录和交叉引用表，并替换为目标文件
+        """
+        if self._file is None:
+            return
+        write = self._file.write
+        # 书签
+        if self._outline:
+            first, last, count = self._write_outline_level(self._outline, _OUTLINES)
+            self._write_raw(_OUTLINES, b"<</Type /Outlines /First %d 0 R /Last %d 0 R /Count %d>>" % (first, last, count))
+        else:
+            self._write_raw(_OUTLINES, b"<</Type /Outlines /Count 0>>")
+        self._write_pages(self._kids)
+        self._write_raw(_CATALOG, b"<</Type /Catalog /Pages %d 0 R /Outlines %d 0 R>>" % (_PAGES, _OUTLINES))
+        # 交叉引用表
+        xref_offset = self._file.tell()
+        size = len(self._offsets) + 1
+        write(b"xref\n0 %d\n0000000000 65535 f \n" % size)
+        for offset in self._offsets:
+            write(b"%010d 00000 n \n" % offset)
+        write(b"trailer\n<</Size %d /Root %d 0 R>>\nstartxref\n%d\n%%%%EOF\n" % (size, _CATALOG, xref_offset))
+        self._file.close()
+        self._file = None
+        os.replace(self._temp_path, self.output_file)
+
+    def _write_pages(self, kids):
+        """
+        写出页面树：所有页面直接作为根节点的子节点
+        :param kids: 所有页面的对象号（array）
+        """
+        write = self._file.write
+        self._mark(_PAGES)
+        write(b"%d 0 obj\n<</Type /Pages /Count %d /Kids [" % (_PAGES, len(kids)))
+        for number in kids:
+            write(b"%d 0 R\n" % number)
+        write(b"]>>\nendobj\n")
+
+    def abort(self):
+        """
+        放弃合并，删除临时文件
+        """
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        try:
+            os.remove(self._temp_path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class PdfIncrementalWriter(PdfStreamWriter):
+    """
+    增量追加：以 PDF 增量更新的方式在本模块写出的合并文件末尾追加页面和书签，已有的字节不改写；
+    只重新写出页面树根节点、书签根节点和原来的最后一个顶层书签，新的交叉引用表通过 /Prev 指向原来的交叉引用表。
+    追加出错时把文件截断回原来的长度
+    """
+
+    def __init__(self, output_file, dedup=False):
+        """
+        :param output_file: 本模块写出的合并文件（可以已经增量追加过）
+        :param dedup: 去重，只在本次追加的文件之间共用对象
+        """
+        self._setup(output_file, False, dedup)
+        self._file = open(output_file, "r+b")
+        try:
+            self._load()
+        except Exception:
+            self._file.close()
+            raise
+        # 已有对象重新写出后的偏移量 {对象号: 偏移量}
+        self._rewritten = {}
+        self._offsets = []
+        self._file.seek(0, os.SEEK_END)
+
+    def _load(self):
+        f = self._file
+        self._original_length = f.seek(0, os.SEEK_END)
+        f.seek(max(0, self._original_length - 1024))
+        tail = f.read()
+        self._prev_xref = int(tail[tail.rindex(b"startxref") + len(b"startxref"):].split()[0])
+        # 交叉引用表的各个分段，从最新的一次更新开始 [(起始对象号, 对象数, 第一行的偏移量)]
+        self._sections = []
+        offset = self._prev_xref
+        size = None
+        while offset is not None:
+            f.seek(offset)
+            if f.readline().strip() != b"xref":
+                raise ValueError(f"不是由 PdfStreamWriter 写出的合并文件: {self.output_file}")
+            while True:
+                line = f.readline()
+                if line.startswith(b"trailer"):
+                    trailer = line + f.readline()
+                    break
+                first, count = (int(value) for value in line.split())
+                self._sections.append((first, count, f.tell()))
+                f.seek(20 * count, os.SEEK_CUR)
+            if size is None:
+                size = int(re.search(rb"/Size (\d+)", trailer).group(1))
+                root = re.search(rb"/Root (\d+) 0 R", trailer)
+                if root is None or int(root.group(1)) != _CATALOG:
+                    raise ValueError(f"不是由 PdfStreamWriter 写出的合并文件: {self.output_file}")
+            prev = re.search(rb"/Prev (\d+)", trailer)
+            offset = int(prev.group(1)) if prev else None
+        # 新对象从原来的对象数开始编号
+        self._first_number = size
+        self._old_kids = array("l", (int(number) for number in _REFERENCE.findall(self._read_body(_PAGES))))
+        outlines = self._read_body(_OUTLINES)
+        first = _OUTLINE_FIRST.search(outlines)
+        last = re.search(rb"/Last (\d+) 0 R", outlines)
+        self._old_outline_first = int(first.group(1)) if first else None
+        self._old_outline_last = int(last.group(1)) if last else None
+        self._old_outline_count = int(re.search(rb"/Count (-?\d+)", outlines).group(1))
+        # 原来的最后一个顶层书签需要加上 /Next，重新写出
+        self._old_last_body = self._read_body(self._old_outline_last) if last else None
+
+    def _read_body(self, number):
+        """
+        读取已有对象（不含流）的内容，使用最新一次更新中的版本
+        """
+        f = self._file
+        for first, count, position in self._sections:
+            if first <= number < first + count:
+                f.seek(position + 20 * (number - first))
+                entry = f.read(20)
+                if entry[17:18] != b"n":
+                    break
+                f.seek(int(entry[:10]))
+                data = b""
+                while b"\nendobj" not in data:
+                    block = f.read(65536)
+                    if not block:
+                        break
+                    data += block
+                return data[data.index(b"\n") + 1:data.index(b"\nendobj")]
+        raise ValueError(f"合并文件中缺少对象 {number}: {self.output_file}")
+
+    @property
+    def page_count(self):
+        return len(self._old_kids) + len(self._kids)
+
+    def _mark(self, number):
+        if number < self._first_number:
+            self._rewritten[number] = self._file.tell()
+        else:
+            super()._mark(number)
+
+    def close(self):
+        """
+        写出更新后的页面树、书签和新的交叉引用表
+        """
+        if self._file is None:
+            return
+        write = self._file.write
+        if self._outline:
+            first, last, count = self._write_outline_level(self._outline, _OUTLINES, prev=self._old_outline_last)
+            if self._old_last_body is not None:
+                self._write_raw(self._old_outline_last, self._old_last_body[:-2] + b"\n/Next %d 0 R>>" % first)
+            first = self._old_outline_first if self._old_outline_first is not None else first
+            self._write_raw(_OUTLINES, b"<</Type /Outlines /First %d 0 R /Last %d 0 R /Count %d>>"
+                            % (first, last, self._old_outline_count + count))
+        self._write_pages(self._old_kids + self._kids)
+        # 新的交叉引用表只包含对象 0（部分阅读器要求从 0 开始）、重新写出的对象和新对象
+        xref_offset = self._file.tell()
+        write(b"xref\n0 1\n0000000000 65535 f \n")
+        for number in sorted(self._rewritten):
+            write(b"%d 1\n%010d 00000 n \n" % (number, self._rewritten[number]))
+        if self._offsets:
+            write(b"%d %d\n" % (self._first_number, len(self._offsets)))
+            for offset in self._offsets:
+                write(b"%010d 00000 n \n" % offset)
+        size = self._first_number + len(self._offsets)
+        write(b"trailer\n<</Size %d /Root %d 0 R /Prev %d>>\nstartxref\n%d\n%%%%EOF\n"
+              % (size, _CATALOG, self._prev_xref, xref_offset))
+        self._file.close()
+        self._file = None
+
+    def abort(self):
+        """
+        放弃追加，把文件截断回原来的长度
+        """
+        if self._file is None:
+            return
+        self._file.truncate(self._original_length)
+        self._file.close()
+        self._file = None
@@ -0,0 +1,95 @@
+import gc
+import sys
+import time
+import tracemalloc
+from io import BytesIO
+
+import CreatePDF
+
+
+def make_steps(count):
+    """
+    生成 count 个测试步骤（每个步骤两行文字）
+    """
+    return [f"Step {i}: verify that the node responds to request {i} within the timeout\nand logs the result"
+            for i in range(count)]
+
+
+def measure(steps, chunked, repeat=3):
+    """
+    生成一份包含这些步骤的 PDF（写入内存）
+    :param chunked: 是否使用长表格模式（PdfFlowables.ChunkedTable），否则整张表格使用一个 Table
+    :param repeat: 计时的次数，取最短的一次
+    :return: (耗时（秒）, 峰值内存（字节，tracemalloc 统计）, PDF 大小)
+    """
+    threshold = CreatePDF.LONG_TABLE_STEPS
+    # 长表格模式只在步骤数超过 LONG_TABLE_STEPS 时使用，临时调整阈值以便比较两种方式
+    CreatePDF.LONG_TABLE_STEPS = 0 if chunked else sys.maxsize
+    try:
+        seconds = None
+        for _ in range(max(1, repeat)):
+            buffer = BytesIO()
+            gc.collect()
+            start = time.perf_counter()
+            CreatePDF.create_pdf("purpose", "background", "area", "mode", "1", "F1", "Title", steps, buffer)
+            elapsed = time.perf_counter() - start
+            seconds = elapsed if seconds is None else min(seconds, elapsed)
+        # 内存单独再生成一次统计，tracemalloc 会明显拖慢生成速度
+        buffer = BytesIO()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            CreatePDF.create_pdf("purpose", "background", "area", "mode", "1", "F1", "Title", steps, buffer)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return seconds, peak, len(buffer.getvalue())
+    finally:
+        CreatePDF.LONG_TABLE_STEPS = threshold
+
+
+def run_benchmark(sizes, plain_limit, repeat=3):
+    """
+    对每个步骤数分别计时长表格模式和整张 Table
+    :param sizes: 步骤数列表
+    :param plain_limit: 步骤数超过该值时不再运行整张 Table（耗时随步骤数增长过快）
+    :param repeat: 每种方式计时的次数，取最短的一次
+    :return: [(步骤数, 长表格模式结果, 整张 Table 结果或 None)]，结果为 measure 的返回值
+    """
+    # 预热：首次生成时加载字体等
+    measure(make_steps(10), True)
+    results = []
+    for count in sizes:
+        steps = make_steps(count)
+        chunked = measure(steps, True, repeat)
+        plain = measure(steps, False, repeat) if count <= plain_limit else None
+        results.append((count, chunked, plain))
+        plain_text = f"{plain[0]:>10.2f} {plain[1] / 1024 / 1024:>10.1f}" if plain else f"{'-':>10} {'-':>10}"
+        print(f"{count:>8} {chunked[0]:>10.2f} {chunked[1] / 1024 / 1024:>10.1f} {plain_text}", flush=True)
+    return results
+
+
+def build_parser(prog=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog=prog, description="过程表格基准测试：比较长表格模式（PdfFlowables.ChunkedTable）与整张 Table 在不同步骤数下的生成耗时和峰值内存。")
+    parser.add_argument("--sizes", default="10,50,100,150,200,300,500,700,1000,10000", help="步骤数，用逗号分隔")
+    parser.add_argument("--plain-limit", type=int, default=10000, help="步骤数超过该值时不运行整张 Table")
+    parser.add_argument("--repeat", type=int, default=3, help="每种方式计时的次数，取最短的一次")
+    return parser
+
+
+def main(argv=None, prog=None):
+    parser = build_parser(prog)
+    args = parser.parse_args(argv)
+    try:
+        sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    except ValueError:
+        parser.error("--sizes 必须是用逗号分隔的整数")
+    print(f"{'步骤数':>8} {'长表格(秒)':>10} {'长表格(MB)':>10} {'Table(秒)':>10} {'Table(MB)':>10}")
+    run_benchmark(sizes, args.plain_limit, args.repeat)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
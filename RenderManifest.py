@@ -0,0 +1,177 @@
+import hashlib
+import json
+import logging
+import os
+
+# 清单文件名，保存在输出文件夹中
+MANIFEST_NAME = ".render_manifest.json"
+
+
+def file_digest(path):
+    """
+    计算文件内容的 SHA-256，用于模板版本
+    :param path: 文件路径
+    :return: 十六进制摘要
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class RenderManifest:
+    """
+    增量生成清单：记录每行数据（连同模板/版式版本）的哈希与其输出文件的对应关系，
+    再次运行时只重新生成哈希变化或输出文件缺失的行
+    """
+
+    def __init__(self, output_folder, version):
+        """
+        :param output_folder: 输出文件夹
+        :param version: 模板/版式版本，变化后所有行都会重新生成
+        """
+        self.output_folder = output_folder
+        self.version = version
+        self.path = os.path.join(output_folder, MANIFEST_NAME)
+        # 上次运行的记录 {行哈希: 输出文件名}
+        self._previous = {}
+        # 上次运行中输出文件被后面标题相同的行覆盖的行 {行哈希: 输出文件名}
+        self._previous_shadowed = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    data = json.load(f)
+                self._previous = data.get("rows", {})
+                self._previous_shadowed = data.get("shadowed", {})
+            except (OSError, ValueError) as e:
+                logging.error(f"读取清单 {self.path} 时出错，将重新生成所有文件: {e}")
+        self._current = {}
+        self._shadowed = {}
+        # 本次运行中各输出文件（小写）被哪些行占用 {文件名: [(行号, 行哈希, 是否本次生成, 上次是否被覆盖, 文件名)]}，
+        # 只在传入行号时记录，见 resolve_overwrites
+        self._claims = {}
+        self.skipped = 0
+        self.rendered = 0
+        self.removed = 0
+
+    def row_hash(self, values):
+        """
+        计算一行数据的哈希
+        :param values: 行数据（字符串序列）
+        :return: 十六进制摘要
+        """
+        payload = json.dumps([self.version, list(values)], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def is_current(self, row_hash, output_name=None, index=None):
+        """
+        判断该行上次已生成且输出文件仍然存在，是则记为跳过
+        :param row_hash: 行哈希
+        :param output_name: 按本次的行集合解析出的输出文件名；与上次的文件名不同（如前面标题相同的行已被删除）时需要重新生成，
+                            使结果与全新生成相同
+        :param index: 行号，输出文件名在生成之后才能确定（可能与其他行重复）时传入，结束时需调用 resolve_overwrites
+        :return: 是否可以跳过
+        """
+        if index is not None and row_hash in self._previous_shadowed:
+            # 上次该行的输出已被后面标题相同的行覆盖，先记为跳过，是否需要重新生成由 resolve_overwrites 决定
+            self._claim(self._previous_shadowed[row_hash], index, row_hash, False, True)
+            self.skipped += 1
+            return True
+        previous_name = self._previous.get(row_hash)
+        if previous_name is None or not os.path.exists(os.path.join(self.output_folder, previous_name)):
+            return False
+        if output_name is not None and output_name != previous_name:
+            return False
+        self._current[row_hash] = previous_name
+        if index is not None:
+            self._claim(previous_name, index, row_hash, False, False)
+        self.skipped += 1
+        return True
+
+    def _claim(self, output_name, index, row_hash, rendered, shadowed):
+        self._claims.setdefault(output_name.lower(), []).append((index, row_hash, rendered, shadowed, output_name))
+
+    def resolve_overwrites(self):
+        """
+        处理本次运行中输出文件名相同的行：文件内容以其中最后一行为准，其余的行记为被覆盖（下次运行时只要仍被覆盖就不必生成）；
+        最后一行被跳过、但文件已被本次生成的前面的行覆盖，或上次就已被覆盖时，该行需要重新生成
+        :return: 需要重新生成的 [(行号, 行哈希)]，按行号排列；重新生成后调用 record 记录
+        """
+        rows_to_render = []
+        for claims in self._claims.values():
+            claims.sort(key=lambda claim: claim[0])
+            index, row_hash, rendered, shadowed, output_name = claims[-1]
+            if not rendered and (shadowed or any(claim[2] for claim in claims[:-1])):
+                rows_to_render.append((index, row_hash))
+                self.skipped -= 1
+            for _, earlier_hash, _, _, _ in claims[:-1]:
+                # 内容相同的行哈希相同，仍由最后一行占用
+                if earlier_hash != row_hash:
+                    self._current.pop(earlier_hash, None)
+                    self._shadowed[earlier_hash] = output_name
+        self._claims = {}
+        return sorted(rows_to_render)
+
+    def output_path(self, row_hash):
+        """
+        :param row_hash: 行哈希
+        :return: 该行记录的输出文件路径，没有记录时为 None
+        """
+        output_name = self._current.get(row_hash, self._previous.get(row_hash, self._previous_shadowed.get(row_hash)))
+        return None if output_name is None else os.path.join(self.output_folder, output_name)
+
+    def record(self, row_hash, output_filename, index=None):
+        """
+        记录一行新生成的输出文件
+        :param row_hash: 行哈希
+        :param output_filename: 输出文件路径
+        :param index: 行号，见 is_current
+        """
+        output_name = os.path.basename(output_filename)
+        self._current[row_hash] = output_name
+        if index is not None:
+            self._claim(output_name, index, row_hash, True, False)
+        self.rendered += 1
+
+    def discard(self, output_filename):
+        """
+        撤销对某个输出文件的记录（如后台写出失败），下次运行时重新生成
+        :param output_filename: 输出文件路径
+        """
+        output_name = os.path.basename(output_filename)
+        for row_hash in [h for h, name in self._current.items() if name == output_name]:
+            del self._current[row_hash]
+            self.rendered -= 1
+
+    def save(self, prune=False):
+        """
+        保存清单
+        :param prune: 是否删除本次运行中已不存在的行对应的输出文件
+        """
+        rows = dict(self._current)
+        stale = {h: name for h, name in self._previous.items() if h not in self._current and h not in self._shadowed}
+        # 本次重新生成时改用了其他文件名的行，上次的文件同样已不再使用；记录不能再以行哈希为键，改以文件名为键保留
+        stale.update((name, name) for h, name in self._previous.items()
+                     if h in self._current and self._current[h] != name)
+        in_use = set(self._current.values())
+        if prune:
+            for output_name in set(stale.values()) - in_use:
+                output_path = os.path.join(self.output_folder, output_name)
+                if os.path.exists(output_path):
+                    os.remove(output_path)
+                    self.removed += 1
+        else:
+            # 不删除时保留旧记录（输出文件已被其他行覆盖的除外），之后仍可清理
+            for h, name in stale.items():
+                if name not in in_use:
+                    rows[h] = name
+
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.version, "rows": rows, "shadowed": self._shadowed}, f, ensure_ascii=False,
+                      indent=0)
+        os.replace(temp_path, self.path)
+
+    def summary(self):
+        return f"跳过 {self.skipped} 行，重新生成 {self.rendered} 行，删除 {self.removed} 个文件"
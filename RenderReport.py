@@ -0,0 +1,117 @@
+import json
+import time
+from datetime import datetime
+
+
+class RenderReport:
+    """
+    渲染报告：缓冲每行的处理结果（状态、未替换的占位符、输出文件、写出字节数、渲染耗时），
+    运行结束时一次性写出为 JSON 或 JSONL 文件
+    """
+
+    def __init__(self, path=None, quiet=False, **info):
+        """
+        :param path: 报告文件路径，以 .jsonl 结尾时每行一条记录，否则写出一个 JSON 对象；为 None 时不写出
+        :param quiet: 安静模式，不在控制台逐行输出成功信息（出错信息仍然输出）
+        :param info: 写入报告的运行信息，如 Excel 文件、模板文件
+        """
+        self.path = path
+        self.quiet = quiet
+        self.info = info
+        self.rows = []
+        self.started = datetime.now().isoformat(timespec="seconds")
+        self._start_time = time.perf_counter()
+
+    def add_success(self, index, output, unresolved=(), bytes_written=None, render_time=None):
+        """
+        记录生成成功的行
+        :param index: 行号（从 0 开始）
+        :param output: 输出文件路径
+        :param unresolved: 未替换的占位符
+        :param bytes_written: 写出的字节数
+        :param render_time: 渲染并保存的耗时（秒）
+        """
+        self.rows.append({
+            "row": index + 1,
+            "status": "ok",
+            "output": output,
+            "unresolved": sorted(unresolved),
+            "bytes": bytes_written,
+            "render_time": None if render_time is None else round(render_time, 6),
+        })
+        if not self.quiet:
+            if unresolved:
+                print(f"未替换的占位符: {set(unresolved)}")
+            else:
+                print("所有占位符已成功替换。")
+            print(f"生成文档：{output}")
+
+    def add_error(self, index, error, render_time=None):
+        """
+        记录生成出错的行
+        :param index: 行号（从 0 开始）
+        :param error: 错误信息
+        """
+        self.rows.append({
+            "row": index + 1,
+            "status": "error",
+            "error": str(error),
+            "render_time": None if render_time is None else round(render_time, 6),
+        })
+        print(f"生成第 {index + 1} 个文档时出错: {error}")
+
+    def mark_error(self, output, error):
+        """
+        将输出到某个文件的成功记录改为出错（如后台写出失败）
+        :param output: 输出文件路径
+        :param error: 错误信息
+        """
+        for row in self.rows:
+            if row["status"] == "ok" and row["output"] == output:
+                row["status"] = "error"
+                row["bytes"] = None
+                row["error"] = str(error)
+                print(f"生成第 {row['row']} 个文档时出错: {error}")
+
+    def add_skipped(self, index, output=None):
+        """
+        记录增量生成时跳过的行
+        :param index: 行号（从 0 开始）
+        :param output: 已存在的输出文件
+        """
+        self.rows.append({"row": index + 1, "status": "skipped", "output": output})
+
+    def discard_skipped(self, index):
+        """
+        撤销某行的跳过记录（该行之后需要重新生成）
+        :param index: 行号（从 0 开始）
+        """
+        self.rows = [row for row in self.rows if not (row["row"] == index + 1 and row["status"] == "skipped")]
+
+    def summary(self):
+        counts = {"ok": 0, "error": 0, "skipped": 0}
+        for row in self.rows:
+            counts[row["status"]] += 1
+        return {
+            "total": len(self.rows),
+            **counts,
+            "bytes": sum(row.get("bytes") or 0 for row in self.rows),
+            "elapsed": round(time.perf_counter() - self._start_time, 3),
+        }
+
+    def write(self):
+        """
+        写出报告文件
+        """
+        if not self.path:
+            return
+        with open(self.path, "w", encoding="utf-8") as f:
+            if self.path.endswith(".jsonl"):
+                f.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in self.rows)
+            else:
+                json.dump({
+                    **self.info,
+                    "started": self.started,
+                    "summary": self.summary(),
+                    "rows": self.rows,
+                }, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,131 @@
+import time
+from contextlib import contextmanager, nullcontext
+
+# 当前启用的计时器，为 None 时各阶段的计时为空操作
+_timer = None
+
+
+class StageTimer:
+    """
+    分阶段计时：记录每个阶段（读取 Excel、加载模板、替换占位符、保存等）的累计耗时和调用次数
+    """
+
+    def __init__(self):
+        # {阶段名: [调用次数, 累计耗时（秒）]}，按首次出现的顺序排列
+        self.stats = {}
+        self._start_time = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start_time)
+
+    def add(self, name, elapsed, count=1):
+        entry = self.stats.setdefault(name, [0, 0.0])
+        entry[0] += count
+        entry[1] += elapsed
+
+    def merge(self, stats):
+        """
+        合并其他计时器（如工作进程）的统计结果
+        :param stats: {阶段名: (调用次数, 累计耗时)}
+        """
+        for name, (count, elapsed) in stats.items():
+            self.add(name, elapsed, count)
+
+    def take(self):
+        """
+        取出当前的统计结果并清空，工作进程用于按批次回传
+        :return: {阶段名: (调用次数, 累计耗时)}
+        """
+        stats = {name: tuple(entry) for name, entry in self.stats.items()}
+        self.stats = {}
+        return stats
+
+    def format_table(self):
+        """
+        :return: 各阶段耗时的汇总表
+        """
+        wall_time = time.perf_counter() - self._start_time
+        lines = ["各阶段耗时：",
+                 f"{'stage':<28}{'calls':>10}{'total(s)':>12}{'avg(ms)':>12}{'share':>8}"]
+        for name, (count, elapsed) in self.stats.items():
+            average = elapsed / count * 1000 if count else 0.0
+            share = elapsed / wall_time * 100 if wall_time else 0.0
+            lines.append(f"{name:<28}{count:>10}{elapsed:>12.3f}{average:>12.3f}{share:>7.1f}%")
+        lines.append(f"{'wall time':<28}{'':>10}{wall_time:>12.3f}")
+        return "\n".join(lines)
+
+
+def enable_timing():
+    """
+    启用分阶段计时
+    :return: 计时器
+    """
+    global _timer
+    _timer = StageTimer()
+    return _timer
+
+
+def disable_timing():
+    global _timer
+    _timer = None
+
+
+def get_timer():
+    """
+    :return: 当前启用的计时器，未启用时为 None
+    """
+    return _timer
+
+
+def stage(name):
+    """
+    对一个阶段计时，未启用时返回空的上下文管理器
+    用法：with stage("save"): ...
+    """
+    if _timer is None:
+        return nullcontext()
+    return _timer.stage(name)
+
+
+def timed_iter(iterable, name):
+    """
+    对迭代器每次取下一项的耗时计时（如逐行读取 Excel），未启用时原样返回
+    """
+    if _timer is None:
+        return iterable
+    return _timed_iter(iter(iterable), name, _timer)
+
+
+def _timed_iter(iterator, name, timer):
+    while True:
+        start_time = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            timer.add(name, time.perf_counter() - start_time, 0)
+            return
+        timer.add(name, time.perf_counter() - start_time)
+        yield item
+
+
+def run_profiled(profile_path, func, *args, **kwargs):
+    """
+    在 cProfile 下运行 func，并把统计数据保存为 pstats 文件；profile_path 为空时直接运行
+    :param profile_path: pstats 文件路径，可用 python -m pstats 查看
+    :return: func 的返回值
+    """
+    if not profile_path:
+        return func(*args, **kwargs)
+    import cProfile
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        profiler.dump_stats(profile_path)
+        print(f"性能分析数据已保存到 {profile_path}")
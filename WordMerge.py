@@ -1,86 +1,174 @@
-import os
-import re  # 新增
-from docx import Document
-from docxcompose.composer import Composer
-import tkinter as tk
-from tkinter import filedialog
-
-# 自然排序函数，将字符串按数字和字母分割，数字部分按数值大小排序，字母部分按字母顺序排序
-def natural_sort_key(s):
-    return [int(text) if text.isdigit() else text.lower() for text in re.split(r'(\d+)', s)]
-
-def merge_word_documents(selected_path, output_file):
-    try:
-        # 获取指定路径下的所有 .docx 文件
-        docx_files = [os.path.join(selected_path, f) for f in os.listdir(selected_path) if f.endswith('.docx')]
-        # 使用自然排序
-        docx_files.sort(key=natural_sort_key)
-
-        if not docx_files:
-            print("指定路径下没有找到 .docx 文件。")
-            return
-
-        # 打开第一个文档作为基础文档
-        first_doc = Document(docx_files[0])
-        composer = Composer(first_doc)
-
-        # 依次合并其他文档
-        for doc_file in docx_files[1:]:
-            doc = Document(doc_file)
-#           composer.doc.add_section()  # 添加分节符
-            composer.doc.add_page_break()  # 添加分页符
-            composer.append(doc)
-
-        # 保存合并后的文档
-        composer.save(output_file)
-        print(f"成功合并所有 Word 文档到 {output_file}。")
-    except Exception as e:
-        print(f"合并 Word 文档时出现错误: {e}")
-
-def select_input_path():
-    path = filedialog.askdirectory()
-    input_path_entry.delete(0, tk.END)
-    input_path_entry.insert(0, path)
-
-def select_output_path():
-    file_path = filedialog.asksaveasfilename(defaultextension=".docx", filetypes=[("Word Document", "*.docx")])
-    output_path_entry.delete(0, tk.END)
-    output_path_entry.insert(0, file_path)
-
-def start_merge():
-    input_path = input_path_entry.get()
-    output_path = output_path_entry.get()
-    if not input_path:
-        print("请选择要合并的 Word 文档所在路径。")
-        return
-    if not output_path:
-        print("请选择合并后文档的保存路径。")
-        return
-    merge_word_documents(input_path, output_path)
-
-# 创建主窗口
-root = tk.Tk()
-root.title("合并 Word 文档")
-
-# 输入路径选择
-input_path_label = tk.Label(root, text="选择要合并的 Word 文档所在路径:")
-input_path_label.pack()
-input_path_entry = tk.Entry(root, width=50)
-input_path_entry.pack()
-input_path_button = tk.Button(root, text="选择路径", command=select_input_path)
-input_path_button.pack()
-
-# 输出路径选择
-output_path_label = tk.Label(root, text="选择合并后文档的保存路径:")
-output_path_label.pack()
-output_path_entry = tk.Entry(root, width=50)
-output_path_entry.pack()
-output_path_button = tk.Button(root, text="选择路径", command=select_output_path)
-output_path_button.pack()
-
-# 开始合并按钮
-merge_button = tk.Button(root, text="开始合并", command=start_merge)
-merge_button.pack()
-
-# 运行主循环
-root.mainloop()
\ No newline at end of file
+import os
+import re  # 新增
+import sys
+from collections import deque
+
+# 自然排序函数，将字符串按数字和字母分割，数字部分按数值大小排序，字母部分按字母顺序排序
+def natural_sort_key(s):
+    return [int(text) if text.isdigit() else text.lower() for text in re.split(r'(\d+)', s)]
+
+def prefetch(load, items, depth):
+    """
+    在线程池中预先加载后续的项目，按 items 的顺序逐个返回加载结果；
+    在途（已加载或正在加载、尚未取走）的项目不超过 depth 个
+    :param load: load(item) 返回加载结果
+    :param items: 要加载的项目
+    :param depth: 预读取的数量，0 表示不预读取，在调用线程中逐个加载
+    """
+    if depth <= 0:
+        yield from map(load, items)
+        return
+
+    from concurrent.futures import ThreadPoolExecutor
+    from itertools import islice
+
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=depth) as executor:
+        pending = deque(executor.submit(load, item) for item in islice(items, depth))
+        while pending:
+            result = pending.popleft().result()
+            # 取走一个就补充一个，后续文档在当前文档合并期间加载
+            for item in islice(items, 1):
+                pending.append(executor.submit(load, item))
+            yield result
+
+def compose_word_documents(docx_files, output_file, prefetch_depth=4):
+    """
+    使用 docxcompose 逐个合并文档，文档之间插入分页符
+    :param docx_files: 已排序的文档路径列表
+    :param output_file: 合并后的文档路径
+    :param prefetch_depth: 合并当前文档时在线程池中预先读取并解析的后续文档数，0 表示不预读取
+    """
+    from docx import Document
+    from docxcompose.composer import Composer
+
+    # 打开第一个文档作为基础文档
+    first_doc = Document(docx_files[0])
+    composer = Composer(first_doc)
+
+    # 依次合并其他文档，合并顺序与 docx_files 相同
+    for doc in prefetch(Document, docx_files[1:], prefetch_depth):
+#       composer.doc.add_section()  # 添加分节符
+        composer.doc.add_page_break()  # 添加分页符
+        composer.append(doc)
+
+    # 保存合并后的文档
+    composer.save(output_file)
+
+def merge_word_documents(selected_path, output_file, bulk=True, prefetch_depth=4):
+    """
+    按文件名自然排序合并文件夹中的 Word 文档，文档之间插入分页符
+    :param selected_path: Word 文档所在路径
+    :param output_file: 合并后的文档路径
+    :param bulk: 优先使用批量合并（见 DocxBulkMerger.py），文档不是同一模板生成时自动改用 Composer 逐个合并
+    :param prefetch_depth: Composer 逐个合并时预先读取并解析的后续文档数，0 表示不预读取
+    :return: 是否合并成功（没有找到 Word 文档或合并出错时为 False，错误信息已输出）
+    """
+    try:
+        # 获取指定路径下的所有 .docx 文件
+        docx_files = [os.path.join(selected_path, f) for f in os.listdir(selected_path) if f.endswith('.docx')]
+        # 使用自然排序
+        docx_files.sort(key=natural_sort_key)
+
+        if not docx_files:
+            print("指定路径下没有找到 .docx 文件。")
+            return False
+
+        if bulk:
+            from DocxBulkMerger import bulk_merge_documents
+
+            try:
+                bulk_merge_documents(docx_files, output_file)
+                print(f"成功合并所有 Word 文档到 {output_file}。")
+                return True
+            except ValueError as e:
+                print(f"无法批量合并，改用 Composer 逐个合并: {e}")
+
+        compose_word_documents(docx_files, output_file, prefetch_depth)
+        print(f"成功合并所有 Word 文档到 {output_file}。")
+        return True
+    except Exception as e:
+        print(f"合并 Word 文档时出现错误: {e}")
+        return False
+
+def run_gui():
+    import tkinter as tk
+    from tkinter import filedialog
+
+    def select_input_path():
+        path = filedialog.askdirectory()
+        input_path_entry.delete(0, tk.END)
+        input_path_entry.insert(0, path)
+
+    def select_output_path():
+        file_path = filedialog.asksaveasfilename(defaultextension=".docx", filetypes=[("Word Document", "*.docx")])
+        output_path_entry.delete(0, tk.END)
+        output_path_entry.insert(0, file_path)
+
+    def start_merge():
+        input_path = input_path_entry.get()
+        output_path = output_path_entry.get()
+        if not input_path:
+            print("请选择要合并的 Word 文档所在路径。")
+            return
+        if not output_path:
+            print("请选择合并后文档的保存路径。")
+            return
+        merge_word_documents(input_path, output_path)
+
+    # 创建主窗口
+    root = tk.Tk()
+    root.title("合并 Word 文档")
+
+    # 输入路径选择
+    input_path_label = tk.Label(root, text="选择要合并的 Word 文档所在路径:")
+    input_path_label.pack()
+    input_path_entry = tk.Entry(root, width=50)
+    input_path_entry.pack()
+    input_path_button = tk.Button(root, text="选择路径", command=select_input_path)
+    input_path_button.pack()
+
+    # 输出路径选择
+    output_path_label = tk.Label(root, text="选择合并后文档的保存路径:")
+    output_path_label.pack()
+    output_path_entry = tk.Entry(root, width=50)
+    output_path_entry.pack()
+    output_path_button = tk.Button(root, text="选择路径", command=select_output_path)
+    output_path_button.pack()
+
+    # 开始合并按钮
+    merge_button = tk.Button(root, text="开始合并", command=start_merge)
+    merge_button.pack()
+
+    # 运行主循环
+    root.mainloop()
+
+def build_parser(prog=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog=prog, description="按文件名自然排序合并文件夹中的 Word 文档，文档之间插入分页符。不带参数时启动图形界面。")
+    parser.add_argument("--gui", action="store_true", help="启动图形界面")
+    parser.add_argument("--input", help="要合并的 Word 文档所在路径")
+    parser.add_argument("--output", help="合并后文档的保存路径")
+    parser.add_argument("--composer", action="store_true",
+                        help="始终使用 docxcompose 逐个合并（默认对同一模板生成的文档使用批量合并）")
+    parser.add_argument("--prefetch", type=int, default=4,
+                        help="Composer 逐个合并时在线程池中预先读取并解析的后续文档数，0 表示不预读取")
+    return parser
+
+def main(argv=None, prog=None):
+    parser = build_parser(prog)
+    args = parser.parse_args(argv)
+    if args.gui or not (args.input or args.output):
+        run_gui()
+        return 0
+    if not args.input or not args.output:
+        parser.error("无界面模式需要同时指定 --input 和 --output")
+    # 合并失败时返回非零的退出码，便于构建服务器判断
+    if not merge_word_documents(args.input, args.output, bulk=not args.composer,
+                                prefetch_depth=args.prefetch):
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from WordMerge import compose_word_documents, natural_sort_key
+
+
+def prepare_inputs(samples, count, folder):
+    """
+    在 folder 中准备 count 个输入文档：依次循环使用样本文档（优先使用硬链接，不占用额外空间）
+    :return: 已排序的文档路径列表
+    """
+    files = []
+    for i in range(count):
+        path = os.path.join(folder, f"Doc {i}.docx")
+        try:
+            os.link(samples[i % len(samples)], path)
+        except OSError:
+            shutil.copyfile(samples[i % len(samples)], path)
+        files.append(path)
+    return files
+
+
+def run_benchmark(samples, sizes, composer_limit, work_dir=None):
+    """
+    对每个文档数量分别计时批量合并和 Composer 逐个合并
+    :param samples: 同一模板生成的样本文档路径列表
+    :param sizes: 文档数量列表
+    :param composer_limit: 文档数量超过该值时不再运行 Composer（耗时随数量增长过快）
+    :param work_dir: 临时文件所在的目录
+    :return: [(文档数, 批量合并耗时, Composer 耗时或 None, 输出文件大小)]
+    """
+    from DocxBulkMerger import bulk_merge_documents
+
+    results = []
+    for count in sizes:
+        folder = tempfile.mkdtemp(prefix=".word-merge-bench-", dir=work_dir)
+        try:
+            files = prepare_inputs(samples, count, folder)
+            output = os.path.join(folder, "merged.docx")
+            start = time.perf_counter()
+            bulk_merge_documents(files, output)
+            bulk_seconds = time.perf_counter() - start
+            size = os.path.getsize(output)
+            composer_seconds = None
+            if count <= composer_limit:
+                start = time.perf_counter()
+                compose_word_documents(files, os.path.join(folder, "composed.docx"))
+                composer_seconds = time.perf_counter() - start
+            results.append((count, bulk_seconds, composer_seconds, size))
+            composer_text = f"{composer_seconds:.2f}" if composer_seconds is not None else "-"
+            print(f"{count:>8} {bulk_seconds:>12.2f} {composer_text:>14} {size / 1024 / 1024:>12.1f}", flush=True)
+        finally:
+            shutil.rmtree(folder, ignore_errors=True)
+    return results
+
+
+def build_parser(prog=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(prog=prog, description="Word 文档合并基准测试：比较批量合并（DocxBulkMerger.py）与 Composer 逐个合并在不同文档数量下的耗时。")
+    parser.add_argument("--samples", required=True,
+                        help="样本文档或文件夹（同一模板生成的 .docx），输入文档依次循环使用样本文档")
+    parser.add_argument("--sizes", default="10,100,500,1000,2000,5000", help="文档数量，用逗号分隔")
+    parser.add_argument("--composer-limit", type=int, default=200,
+                        help="文档数量超过该值时不运行 Composer 逐个合并")
+    parser.add_argument("--work-dir", help="临时文件所在的目录（默认使用系统临时目录）")
+    return parser
+
+
+def main(argv=None, prog=None):
+    parser = build_parser(prog)
+    args = parser.parse_args(argv)
+    if os.path.isdir(args.samples):
+        samples = sorted((os.path.join(args.samples, f) for f in os.listdir(args.samples) if f.endswith('.docx')),
+                         key=natural_sort_key)
+    else:
+        samples = [args.samples]
+    if not samples:
+        parser.error("没有找到样本文档")
+    try:
+        sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    except ValueError:
+        parser.error("--sizes 必须是用逗号分隔的整数")
+    print(f"{'文档数':>8} {'批量合并(秒)':>12} {'Composer(秒)':>14} {'输出(MB)':>12}")
+    run_benchmark(samples, sizes, args.composer_limit, args.work_dir)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+import os
+import sys
+import zipfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DocxBulkMerger import bulk_merge_documents  # noqa: E402
+from DocxZipWriter import DocxZipWriter  # noqa: E402
+from WordMerge import compose_word_documents  # noqa: E402
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def _write_docx(path, index):
+    from docx import Document
+    from docx.oxml import parse_xml
+
+    document = Document()
+    document.add_paragraph(f"Title {index}", style="Heading 1")
+    paragraph = document.add_paragraph(f"body {index}")
+    # 书签的编号在各文档中相同，合并后需要重新编号
+    paragraph._p.append(parse_xml(
+        '<w:bookmarkStart xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+        f'w:id="0" w:name="mark{index}"/>'))
+    paragraph._p.append(parse_xml(
+        '<w:bookmarkEnd xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" w:id="0"/>'))
+    # 通过样式编号的列表，每个文档各自从 1 开始
+    document.add_paragraph(f"first {index}", style="List Number")
+    document.add_paragraph(f"second {index}", style="List Number")
+    document.add_paragraph(f"bullet {index}", style="List Bullet")
+    table = document.add_table(rows=2, cols=2)
+    table.cell(0, 0).text = f"cell {index}"
+    table.cell(1, 1).text = f"last {index}"
+    document.save(str(path))
+    return str(path)
+
+
+@pytest.fixture
+def docx_files(tmp_path):
+    return [_write_docx(tmp_path / f"doc{i}.docx", i) for i in range(3)]
+
+
+def _summary(path):
+    """
+    :return: 正文各段落的 (样式, 文本, 是否分页, 列表编号是否从头开始) 和各表格的单元格文本
+    """
+    from docx import Document
+
+    document = Document(str(path))
+    restarted = {num.get(_W + "numId") for num in document.part.numbering_part.element.iterfind(_W + "num")
+                 if num.find(f"{_W}lvlOverride/{_W}startOverride") is not None}
+    paragraphs = []
+    for paragraph in document.paragraphs:
+        num_id = paragraph._p.find(f"{_W}pPr/{_W}numPr/{_W}numId")
+        paragraphs.append((
+            paragraph.style.name,
+            paragraph.text,
+            paragraph._p.find(f'.//{_W}br[@{_W}type="page"]') is not None,
+            num_id is not None and num_id.get(_W + "val") in restarted,
+        ))
+    tables = [[cell.text for row in table.rows for cell in row.cells] for table in document.tables]
+    return paragraphs, tables
+
+
+def _ids(path, tag):
+    from docx import Document
+
+    return [element.get(_W + "id") for element in Document(str(path)).element.body.iter(_W + tag)]
+
+
+def test_bulk_merge_matches_composer(tmp_path, docx_files):
+    expected = tmp_path / "composer.docx"
+    compose_word_documents(docx_files, str(expected), prefetch_depth=0)
+    output = tmp_path / "bulk.docx"
+    assert bulk_merge_documents(docx_files, str(output)) == 3
+
+    assert _summary(output) == _summary(expected)
+    # 第二个及之后的文档的编号列表从头开始，项目符号不变
+    assert [restart for _, _, _, restart in _summary(output)[0]].count(True) == 2
+    # 书签编号不重复，起止成对
+    bookmarks = _ids(output, "bookmarkStart")
+    assert len(bookmarks) == len(set(bookmarks)) == 3
+    assert bookmarks == _ids(output, "bookmarkEnd")
+    with zipfile.ZipFile(output) as zf:
+        assert zf.testzip() is None
+
+
+def test_bulk_merge_rejects_different_templates(tmp_path, docx_files):
+    from docx import Document
+
+    other = tmp_path / "other.docx"
+    document = Document(docx_files[1])
+    document.styles.add_style("Extra", 1)
+    document.save(str(other))
+    output = tmp_path / "bulk.docx"
+    with pytest.raises(ValueError):
+        bulk_merge_documents([docx_files[0], str(other)], str(output))
+    assert not os.path.exists(output)
+    assert not os.path.exists(str(output) + ".tmp")
+
+
+@pytest.mark.parametrize("chunked", [False, True])
+def test_zip_writer_replaces_parts(tmp_path, docx_files, chunked):
+    from docx import Document
+
+    with zipfile.ZipFile(docx_files[1]) as zf:
+        document_xml = zf.read("word/document.xml")
+    output = tmp_path / "out.docx"
+    writer = DocxZipWriter(docx_files[0], 6)
+    part = [document_xml[:100], document_xml[100:]] if chunked else document_xml
+    writer.write(str(output), {"word/document.xml": part})
+
+    with zipfile.ZipFile(output) as zf, zipfile.ZipFile(docx_files[0]) as template:
+        assert zf.testzip() is None
+        assert zf.namelist() == template.namelist()
+        for name in zf.namelist():
+            expected = document_xml if name == "word/document.xml" else template.read(name)
+            assert zf.read(name) == expected
+    assert Document(str(output)).paragraphs[0].text == "Title 1"
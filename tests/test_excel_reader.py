@@ -0,0 +1,33 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ExcelReader import ExcelRowSource, normalize_columns  # noqa: E402
+
+
+def test_reads_first_sheet_not_active(tmp_path):
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["title"])
+    sheet.append(["T1"])
+    notes = workbook.create_sheet("notes")
+    notes.append(["note"])
+    notes.append(["n"])
+    # 保存时选中第二个工作表
+    workbook.active = 1
+    path = tmp_path / "two_sheets.xlsx"
+    workbook.save(path)
+
+    source = ExcelRowSource(str(path))
+    assert source.columns == ["title"]
+    assert list(source) == [("T1",)]
+
+
+def test_duplicate_columns_are_unique():
+    # 与 pd.read_excel 的列名一致
+    assert normalize_columns(["a", "a.1", "a"]) == ["a", "a.1", "a.2"]
+    assert normalize_columns(["a", "a", "a.1", "a"]) == ["a", "a.2", "a.1", "a.3"]
+    assert normalize_columns(["x", "x", "x.1", "x.1", None, "y"]) == ["x", "x.2", "x.1", "x.1.1", "Unnamed: 4", "y"]
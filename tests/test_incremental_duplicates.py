@@ -0,0 +1,72 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from CreateDocx import generate_documents  # noqa: E402
+
+
+def _write_excel(path, rows):
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["title", "body"])
+    for row in rows:
+        sheet.append(list(row))
+    workbook.save(path)
+
+
+def _read_body(path):
+    from docx import Document
+
+    return [p.text for p in Document(path).paragraphs][1]
+
+
+@pytest.fixture
+def template(tmp_path):
+    from docx import Document
+
+    doc = Document()
+    doc.add_paragraph("{{title}} doc")
+    doc.add_paragraph("{{body}}")
+    path = tmp_path / "template.docx"
+    doc.save(path)
+    return str(path)
+
+
+def _generate(tmp_path, template, rows, workers, capsys):
+    excel = tmp_path / "data.xlsx"
+    _write_excel(excel, rows)
+    output = tmp_path / "out"
+    output.mkdir(exist_ok=True)
+    generate_documents(str(excel), template, str(output), workers=workers, incremental=True, quiet=True)
+    summary = capsys.readouterr().out.strip().splitlines()[-1]
+    return output, summary
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_duplicate_titles_across_incremental_rerun(tmp_path, template, capsys, workers):
+    # 标题相同的两行：后一行覆盖前一行的输出
+    output, _ = _generate(tmp_path, template, [("X", "from A"), ("X", "from B")], workers, capsys)
+    assert _read_body(output / "X doc.docx") == "from B"
+
+    # 数据不变时两行都不需要重新生成，内容仍以后一行为准
+    output, summary = _generate(tmp_path, template, [("X", "from A"), ("X", "from B")], workers, capsys)
+    assert summary.startswith("跳过 2 行，重新生成 0 行")
+    assert _read_body(output / "X doc.docx") == "from B"
+
+    # 后一行改为其他标题后，前一行的输出必须重新生成
+    output, summary = _generate(tmp_path, template, [("X", "from A"), ("Y", "from B")], workers, capsys)
+    assert summary.startswith("跳过 0 行，重新生成 2 行")
+    assert _read_body(output / "X doc.docx") == "from A"
+    assert _read_body(output / "Y doc.docx") == "from B"
+
+    # 前一行改为 Y 时覆盖了后一行的输出，后一行虽然没有变化也要重新生成
+    output, summary = _generate(tmp_path, template, [("Y", "from A"), ("Y", "from B")], workers, capsys)
+    assert _read_body(output / "Y doc.docx") == "from B"
+    output, summary = _generate(tmp_path, template, [("Y", "from A"), ("Y", "from B")], workers, capsys)
+    assert summary.startswith("跳过 2 行，重新生成 0 行")
+    assert _read_body(output / "Y doc.docx") == "from B"
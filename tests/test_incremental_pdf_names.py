@@ -0,0 +1,62 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from CreatePDF import PDF_FIELDS, generate_pdfs  # noqa: E402
+
+
+def _write_excel(path, rows):
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(list(PDF_FIELDS))
+    for title, purpose in rows:
+        sheet.append([purpose, "background", "area", "mode", "1", "F1", title, "step 1;step 2"])
+    workbook.save(path)
+
+
+def _read_text(path):
+    from PyPDF2 import PdfReader
+
+    return "".join(page.extract_text() for page in PdfReader(str(path)).pages)
+
+
+def _generate(tmp_path, rows, workers, prune=False):
+    excel = tmp_path / "data.xlsx"
+    _write_excel(excel, rows)
+    output = tmp_path / "out"
+    output.mkdir(exist_ok=True)
+    summary = generate_pdfs(str(excel), str(output), incremental=True, prune=prune, workers=workers)
+    return output, summary
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_names_follow_current_rows_after_deletion(tmp_path, workers):
+    # 标题相同的两行依次命名为 X.pdf、X (1).pdf
+    output, _ = _generate(tmp_path, [("X", "purpose-A"), ("X", "purpose-B")], workers)
+    assert sorted(os.listdir(output)) == [".render_manifest.json", "X (1).pdf", "X.pdf"]
+
+    # 删除前一行后，后一行与全新生成时一样命名为 X.pdf，需要重新生成
+    output, summary = _generate(tmp_path, [("X", "purpose-B")], workers, prune=True)
+    assert "跳过 0 行，重新生成 1 行，删除 1 个文件" in summary
+    assert sorted(os.listdir(output)) == [".render_manifest.json", "X.pdf"]
+    assert "purpose-B" in _read_text(output / "X.pdf")
+
+    # 再次运行时没有变化
+    output, summary = _generate(tmp_path, [("X", "purpose-B")], workers, prune=True)
+    assert "跳过 1 行，重新生成 0 行，删除 0 个文件" in summary
+
+
+def test_renamed_output_is_pruned_later(tmp_path):
+    output, _ = _generate(tmp_path, [("X", "purpose-A"), ("X", "purpose-B")], 1)
+    # 不删除时保留旧文件，之后的 --prune 仍能清理
+    output, summary = _generate(tmp_path, [("X", "purpose-B")], 1)
+    assert "重新生成 1 行" in summary
+    assert "purpose-B" in _read_text(output / "X.pdf")
+    output, summary = _generate(tmp_path, [("X", "purpose-B")], 1, prune=True)
+    assert "跳过 1 行，重新生成 0 行，删除 1 个文件" in summary
+    assert sorted(os.listdir(output)) == [".render_manifest.json", "X.pdf"]
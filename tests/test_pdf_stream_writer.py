@@ -0,0 +1,140 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PDFMerge import append_pdf_files, tree_merge_pdf_files  # noqa: E402
+from PdfStreamWriter import PdfIncrementalWriter, PdfStreamWriter  # noqa: E402
+
+
+def _write_pdf(path, name, pages, bookmark=False):
+    from reportlab.pdfgen import canvas
+
+    c = canvas.Canvas(str(path))
+    for page in range(pages):
+        c.drawString(100, 700, f"{name} page {page + 1}")
+        if bookmark:
+            # 文件自带的书签，合并后作为该文件书签的子书签
+            key = f"{name}-{page}"
+            c.bookmarkPage(key)
+            c.addOutlineEntry(f"{name} section {page + 1}", key, level=0)
+        c.showPage()
+    c.save()
+
+
+@pytest.fixture
+def pdf_files(tmp_path):
+    files = []
+    for i in range(5):
+        path = tmp_path / f"doc{i}.pdf"
+        _write_pdf(path, f"doc{i}", i % 3 + 1, bookmark=i == 1)
+        files.append((f"doc{i}.pdf", str(path)))
+    return files
+
+
+def _summary(path):
+    """
+    :return: (各页文本, 书签树 [(标题, 页码, 子书签)])
+    """
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(str(path), strict=True)
+
+    def outline(items):
+        nodes = []
+        for item in items:
+            if isinstance(item, list):
+                title, page, _ = nodes[-1]
+                nodes[-1] = (title, page, outline(item))
+            else:
+                # PdfMerger 写出的书签目标直接使用页码而不是页面引用
+                page = item.page if isinstance(item.page, int) else reader.get_destination_page_number(item)
+                nodes.append((item.title, page, []))
+        return nodes
+
+    return [page.extract_text() for page in reader.pages], outline(reader.outline)
+
+
+def _merge_with_pdf_merger(pdf_files, output_file):
+    from PyPDF2 import PdfMerger
+
+    with PdfMerger() as merger:
+        for title, file_path in pdf_files:
+            merger.append(file_path, outline_item=title)
+        merger.write(str(output_file))
+
+
+@pytest.mark.parametrize("dedup", [False, True])
+def test_stream_writer_matches_pdf_merger(tmp_path, pdf_files, dedup):
+    expected = tmp_path / "expected.pdf"
+    _merge_with_pdf_merger(pdf_files, expected)
+    output = tmp_path / "stream.pdf"
+    with PdfStreamWriter(str(output), dedup=dedup) as writer:
+        for title, file_path in pdf_files:
+            writer.append(file_path, title)
+    assert writer.page_count == 9
+    assert _summary(output) == _summary(expected)
+    assert not os.path.exists(str(output) + ".tmp")
+
+
+def test_tree_merge_matches_serial_merge(tmp_path, pdf_files):
+    expected = tmp_path / "expected.pdf"
+    _merge_with_pdf_merger(pdf_files, expected)
+    output = tmp_path / "tree.pdf"
+    tree_merge_pdf_files(pdf_files, str(output), workers=2, chunk_size=2)
+    assert _summary(output) == _summary(expected)
+
+
+def test_aborted_stream_writer_leaves_no_output(tmp_path, pdf_files):
+    output = tmp_path / "stream.pdf"
+    with pytest.raises(RuntimeError):
+        with PdfStreamWriter(str(output)) as writer:
+            writer.append(pdf_files[0][1], pdf_files[0][0])
+            raise RuntimeError
+    assert not os.path.exists(output)
+    assert not os.path.exists(str(output) + ".tmp")
+
+
+@pytest.mark.parametrize("dedup", [False, True])
+def test_append_matches_full_rebuild(tmp_path, pdf_files, dedup):
+    expected = tmp_path / "expected.pdf"
+    _merge_with_pdf_merger(pdf_files, expected)
+    output = tmp_path / "merged.pdf"
+    assert append_pdf_files(pdf_files[:2], str(output), dedup=dedup) == 2
+    original = output.read_bytes()
+
+    # 分两次追加，第二次追加在已有的增量更新之后
+    assert append_pdf_files(pdf_files[:4], str(output), dedup=dedup) == 2
+    assert append_pdf_files(pdf_files, str(output), dedup=dedup) == 1
+    # 已有的内容不改写
+    assert output.read_bytes().startswith(original)
+    assert _summary(output) == _summary(expected)
+
+    # 没有新增文件时不改动
+    appended = output.read_bytes()
+    assert append_pdf_files(pdf_files, str(output), dedup=dedup) == 0
+    assert output.read_bytes() == appended
+
+
+def test_append_rebuilds_when_merged_file_changed(tmp_path, pdf_files):
+    output = tmp_path / "merged.pdf"
+    append_pdf_files(pdf_files[:3], str(output))
+    _write_pdf(pdf_files[1][1], "changed", 2)
+    assert append_pdf_files(pdf_files, str(output)) == 5
+
+    expected = tmp_path / "expected.pdf"
+    _merge_with_pdf_merger(pdf_files, expected)
+    assert _summary(output) == _summary(expected)
+
+
+def test_aborted_append_restores_file(tmp_path, pdf_files):
+    output = tmp_path / "merged.pdf"
+    append_pdf_files(pdf_files[:2], str(output))
+    original = output.read_bytes()
+    with pytest.raises(RuntimeError):
+        with PdfIncrementalWriter(str(output)) as writer:
+            writer.append(pdf_files[2][1], pdf_files[2][0])
+            raise RuntimeError
+    assert output.read_bytes() == original